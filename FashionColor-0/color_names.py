@@ -80,7 +80,10 @@ class ColorNames():
         
         # Convert from sRGB color spave to LAB color space
         # https://stackoverflow.com/questions/13405956/convert-an-image-rgb-lab-with-python
-        self.lab = color.rgb2lab(rgb)
+        # Flatten to an (N, 3) palette with a parallel list of names, so each lookup is one vectorized distance scan
+        self.lab = color.rgb2lab(rgb).reshape(-1, 3)
+        self.names = [self.colors_dict[hexV] for hexV in self.hex_rgb_colors]
+        self.lab_sq_norms = (self.lab**2).sum(axis=1)  # |p|^2 per palette color, for the distance expansion below
 
     
     def get_color_name(self, peaked_color):
@@ -88,22 +91,31 @@ class ColorNames():
         # peaked_color = '#673429ff'
         peaked_rgb = np.asarray([int(peaked_color[1:3], 16), int(peaked_color[3:5], 16), int(peaked_color[5:7], 16)], np.uint8)
         peaked_rgb = np.dstack((peaked_rgb[0], peaked_rgb[1], peaked_rgb[2]))
-        peaked_lab = color.rgb2lab(peaked_rgb)
+        peaked_lab = color.rgb2lab(peaked_rgb).reshape(3)
         
-        # Compute Euclidean distance from peaked_lab to each element of lab
-        lab_dist = ((self.lab[:,:,0] - peaked_lab[:,:,0])**2 + (self.lab[:,:,1] - peaked_lab[:,:,1])**2 + (self.lab[:,:,2] - peaked_lab[:,:,2])**2)**0.5
+        # Squared Euclidean distance from peaked_lab to each element of lab as |p|^2 - 2 p.q (|q|^2 and the sqrt don't change the argmin)
+        lab_dist = self.lab_sq_norms - 2 * (self.lab @ peaked_lab)
         
         # Get the index of the minimum distance
         min_index = lab_dist.argmin()
         
-        # Get hex string of the color with the minimum Euclidean distance (minimum distance in LAB color space)
-        peaked_closest_hex = self.hex_rgb_colors[min_index]
-        
-        # Get color name from the dictionary
-        peaked_color_name = self.colors_dict[peaked_closest_hex]
+        # Get the name of the color with the minimum Euclidean distance (minimum distance in LAB color space)
+        peaked_color_name = self.names[min_index]
         
         return peaked_color_name
 
+    def get_color_names(self, peaked_colors):
+        # Batch version of get_color_name: convert all peaked colors to LAB in one call and find every nearest palette color with a single matrix product
+        peaked_rgb = np.asarray([[int(c[1:3], 16), int(c[3:5], 16), int(c[5:7], 16)] for c in peaked_colors], np.uint8)
+        if len(peaked_rgb) == 0:
+            return []
+        peaked_lab = color.rgb2lab(peaked_rgb.reshape(-1, 1, 3)).reshape(-1, 3)
+        
+        # Squared distances |p|^2 - 2 p.q, shape (num_peaked, num_palette)
+        lab_dist = self.lab_sq_norms - 2 * (peaked_lab @ self.lab.T)
+        
+        return [self.names[i] for i in lab_dist.argmin(axis=1)]
+
 # # Testing
 # peaked_color = '#673429'
 # color_obj = ColorNames()
@@ -3,22 +3,63 @@ FastAPI backend for Fashion Scraper Dashboard.
 Serves data from SQLite database to the React frontend.
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse, FileResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import StreamingResponse, FileResponse, Response
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from typing import List, Optional
+from decimal import Decimal
 import sqlite3
+import queue
 import json
+import orjson
+from cachetools import TTLCache
 from pathlib import Path
-from datetime import datetime
+from datetime import date, datetime
+from functools import lru_cache
+from contextlib import asynccontextmanager
 import asyncio
 import sys
 import os
 
+from init_database import init_database
 
-app = FastAPI(title="Fashion Scraper API", version="1.0.0")
+
+def _orjson_default(obj):
+    """Serialize types orjson does not handle natively."""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def _dumps(content) -> bytes:
+    """Serialize content to JSON bytes with orjson."""
+    return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(Response):
+    """JSON response serialized by orjson, with a fallback for Decimal/datetime values."""
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return _dumps(content)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Check the schema on startup and optimize the database on shutdown."""
+    await asyncio.to_thread(ensure_schema)
+    yield
+    await asyncio.to_thread(optimize_database)
+
+
+app = FastAPI(title="Fashion Scraper API", version="1.0.0", default_response_class=FastJSONResponse,
+              lifespan=lifespan)
 
 # Enable CORS for frontend
 app.add_middleware(
@@ -33,6 +74,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress the larger JSON payloads (products, price and color trends);
+# the text/event-stream scraping progress feed is left uncompressed
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 DB_PATH = Path(__file__).parent / "fashion_scraper.db"
 
 
@@ -85,16 +130,135 @@ class StatsResponse(BaseModel):
     price_range: dict
 
 
+# Per-connection tuning: WAL for concurrent readers, memory-mapped I/O and
+# a larger page cache so repeated dashboard queries stay in memory
+CONNECTION_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+]
+
+# Days of history /api/color-price-trends covers when no start_date is given
+COLOR_PRICE_TRENDS_DEFAULT_DAYS = 90
+
+
+def _connect() -> sqlite3.Connection:
+    """Open a new tuned database connection."""
+    conn = sqlite3.connect(
+        DB_PATH,
+        check_same_thread=False,
+        isolation_level=None,
+        cached_statements=256,
+    )
+    conn.row_factory = sqlite3.Row
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+class ConnectionPool:
+    """Reuse open SQLite connections across requests instead of reconnecting."""
+
+    def __init__(self, max_idle: int = 8):
+        self._idle = queue.LifoQueue(maxsize=max_idle)
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return _connect()
+
+    def release(self, conn: sqlite3.Connection):
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+
+_pool = ConnectionPool()
+
+
+# Serialized response bodies for endpoints whose data only changes when a
+# scrape is imported, keyed by query string
+_COLOR_TRENDS_CACHE = TTLCache(maxsize=128, ttl=60)
+_FILTER_OPTIONS_CACHE = TTLCache(maxsize=8, ttl=300)
+_STATS_CACHE = TTLCache(maxsize=8, ttl=300)
+_RESPONSE_CACHES = [_COLOR_TRENDS_CACHE, _FILTER_OPTIONS_CACHE, _STATS_CACHE]
+
+
+def flush_response_caches():
+    """Drop all cached response bodies."""
+    for cache in _RESPONSE_CACHES:
+        cache.clear()
+
+
+async def _cached_response(cache: TTLCache, request: Request, fetch, *args) -> Response:
+    """Serve fetch(*args) as JSON, reusing the serialized body while cached."""
+    key = request.url.query
+    body = cache.get(key)
+    if body is None:
+        data = await asyncio.to_thread(fetch, *args)
+        body = cache[key] = _dumps(data)
+    return Response(content=body, media_type="application/json")
+
+
 def get_db():
-    """Get database connection."""
+    """FastAPI dependency yielding a pooled database connection."""
     if not DB_PATH.exists():
         raise HTTPException(status_code=500, detail="Database not found")
 
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    conn = _pool.acquire()
+    try:
+        yield conn
+    finally:
+        _pool.release(conn)
+
+
+# Objects created by the current init_database that the queries rely on
+REQUIRED_SCHEMA = {"color_history_items", "color_categories", "idx_products_site_key", "ix_ph_scraped"}
 
 
+def ensure_schema():
+    """
+    Bring a database created by an older init_database up to date.
+
+    Startup only reads sqlite_master when the schema is current; the DDL,
+    backfill and seeding run only when something is missing, so a normal
+    start never waits on (or fails against) an import's write lock.
+    """
+    if not DB_PATH.exists():
+        return
+
+    conn = _connect()
+    try:
+        names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+    finally:
+        conn.close()
+    if REQUIRED_SCHEMA <= names:
+        return
+
+    try:
+        init_database(DB_PATH)
+    except sqlite3.OperationalError as e:
+        print(f"WARNING: could not upgrade the database schema ({e}); run init_database.py")
+
+
+def optimize_database():
+    """Let SQLite refresh planner statistics the API's queries have shown to be stale."""
+    if not DB_PATH.exists():
+        return
+
+    conn = _connect()
+    try:
+        conn.execute("PRAGMA optimize")
+    except sqlite3.OperationalError as e:
+        print(f"WARNING: PRAGMA optimize skipped ({e})")
+    finally:
+        conn.close()
+
+@lru_cache(maxsize=4096)
 def map_site_name(site: str) -> str:
     """Map site name to frontend format."""
     if not site:
@@ -107,6 +271,7 @@ def map_site_name(site: str) -> str:
     return site_lower
 
 
+@lru_cache(maxsize=4096)
 def map_clothing_subtype(clothing_type: str) -> str:
     """Map clothing_type from database to frontend clothingSubtype."""
     if not clothing_type:
@@ -143,72 +308,79 @@ def health_check():
     }
 
 
-@app.get("/api/products", response_model=PaginatedResponse)
-def get_products(
-    site: Optional[str] = None,
-    gender: Optional[str] = None,
-    clothing_type: Optional[str] = None,
-    page: int = 1,
-    page_size: int = 10,
-    start_date: Optional[str] = None,
-    end_date: Optional[str] = None
+def _fetch_products(
+    conn: sqlite3.Connection,
+    site: Optional[str],
+    gender: Optional[str],
+    clothing_type: Optional[str],
+    page: int,
+    page_size: int,
+    start_date: Optional[str],
+    end_date: Optional[str]
 ):
-    """
-    Get all products with latest price and color data (paginated).
-
-    Query params:
-    - site: Filter by site (fashionbug/coolplanet)
-    - gender: Filter by gender (men/women)
-    - clothing_type: Filter by clothing type
-    - page: Page number (default 1)
-    - page_size: Items per page (default 10)
-    """
-    conn = get_db()
+    """Blocking query work for get_products(); runs in a worker thread."""
     cursor = conn.cursor()
 
-    # Build date filter for subqueries
-    date_filter_ph = ""
-    date_filter_ch = ""
-    date_filter_ih = ""
+    # Build date filter for the "latest record" CTEs
+    date_filter = ""
     date_params = []
 
     if start_date and end_date:
-        date_filter_ph = " AND DATE(scraped_at) BETWEEN ? AND ?"
-        date_filter_ch = " AND DATE(scraped_at) BETWEEN ? AND ?"
-        date_filter_ih = " AND DATE(scraped_at) BETWEEN ? AND ?"
-        date_params = [start_date, end_date, start_date, end_date, start_date, end_date]
+        date_filter = " WHERE DATE(scraped_at) BETWEEN ? AND ?"
+        date_params = [start_date, end_date]
     elif start_date:
-        date_filter_ph = " AND DATE(scraped_at) >= ?"
-        date_filter_ch = " AND DATE(scraped_at) >= ?"
-        date_filter_ih = " AND DATE(scraped_at) >= ?"
-        date_params = [start_date, start_date, start_date]
+        date_filter = " WHERE DATE(scraped_at) >= ?"
+        date_params = [start_date]
     elif end_date:
-        date_filter_ph = " AND DATE(scraped_at) <= ?"
-        date_filter_ch = " AND DATE(scraped_at) <= ?"
-        date_filter_ih = " AND DATE(scraped_at) <= ?"
-        date_params = [end_date, end_date, end_date]
+        date_filter = " WHERE DATE(scraped_at) <= ?"
+        date_params = [end_date]
+
+    # Latest row per product in each history table, ranked once with a window
+    # function instead of a correlated MAX(id) subquery per product row
+    cte_query = f"""
+        WITH latest_name AS (
+            SELECT product_id, name,
+                   ROW_NUMBER() OVER (PARTITION BY product_id ORDER BY id DESC) AS rn
+            FROM product_names
+        ),
+        latest_price AS (
+            SELECT id, product_id, price, price_numeric, scraped_at,
+                   ROW_NUMBER() OVER (PARTITION BY product_id ORDER BY id DESC) AS rn
+            FROM price_history{date_filter}
+        ),
+        latest_color AS (
+            SELECT id, product_id, colors,
+                   ROW_NUMBER() OVER (PARTITION BY product_id ORDER BY id DESC) AS rn
+            FROM color_history{date_filter}
+        ),
+        latest_image AS (
+            SELECT id, product_id, image_url,
+                   ROW_NUMBER() OVER (PARTITION BY product_id ORDER BY id DESC) AS rn
+            FROM image_history{date_filter}
+        )
+    """
 
     # Build base query with filters - get latest records within date range
-    base_query = f"""
+    base_query = """
         FROM products p
-        LEFT JOIN product_names pn ON p.id = pn.product_id
-        LEFT JOIN price_history ph ON p.id = ph.product_id
-        LEFT JOIN color_history ch ON p.id = ch.product_id
-        LEFT JOIN image_history ih ON p.id = ih.product_id
+        JOIN latest_name pn ON pn.product_id = p.id AND pn.rn = 1
+        LEFT JOIN latest_price ph ON ph.product_id = p.id AND ph.rn = 1
+        LEFT JOIN latest_color ch ON ch.product_id = p.id AND ch.rn = 1
+        LEFT JOIN latest_image ih ON ih.product_id = p.id AND ih.rn = 1
         WHERE p.is_active = 1
-          AND pn.id IN (SELECT MAX(id) FROM product_names GROUP BY product_id)
-          AND (ph.id IS NULL OR ph.id IN (SELECT MAX(id) FROM price_history WHERE product_id = p.id{date_filter_ph}))
-          AND (ch.id IS NULL OR ch.id IN (SELECT MAX(id) FROM color_history WHERE product_id = p.id{date_filter_ch}))
-          AND (ih.id IS NULL OR ih.id IN (SELECT MAX(id) FROM image_history WHERE product_id = p.id{date_filter_ih}))
     """
 
-    params = date_params.copy()
+    params = date_params * 3
+
+    if date_params:
+        # A product with price, color or image history must have some of it
+        # within the date range; a table it has no history in doesn't exclude it
+        for alias, table in (("ph", "price_history"), ("ch", "color_history"), ("ih", "image_history")):
+            base_query += f" AND ({alias}.id IS NOT NULL OR NOT EXISTS (SELECT 1 FROM {table} WHERE product_id = p.id))"
 
     if site:
-        if site.lower() == "fashionbug":
-            base_query += " AND (LOWER(p.site) LIKE '%fashion%' OR LOWER(p.site) LIKE '%bug%')"
-        elif site.lower() == "coolplanet":
-            base_query += " AND (LOWER(p.site) LIKE '%cool%' OR LOWER(p.site) LIKE '%planet%')"
+        base_query += " AND p.site_key = ?"
+        params.append(site.lower())
 
     if gender:
         base_query += " AND LOWER(p.gender) = ?"
@@ -219,7 +391,7 @@ def get_products(
         params.append(f"%{clothing_type.lower()}%")
 
     # Get total count
-    count_query = f"SELECT COUNT(DISTINCT p.id) {base_query}"
+    count_query = f"{cte_query} SELECT COUNT(*) {base_query}"
     cursor.execute(count_query, params)
     total = cursor.fetchone()[0]
 
@@ -229,14 +401,13 @@ def get_products(
 
     # Get paginated results
     data_query = f"""
-        SELECT DISTINCT
+        {cte_query}
+        SELECT
             p.id,
-            p.product_url,
             p.site,
             p.gender,
             p.clothing_type,
             pn.name,
-            ph.price,
             ph.price_numeric,
             ph.scraped_at as price_date,
             ch.colors,
@@ -246,17 +417,21 @@ def get_products(
         LIMIT ? OFFSET ?
     """
 
+    # Plain tuples for the page rows - unpacked positionally below instead
+    # of a sqlite3.Row key lookup per field
+    cursor.row_factory = None
     cursor.execute(data_query, params + [page_size, offset])
-    products = cursor.fetchall()
 
     # Map to frontend format
+    today = date.today().isoformat()
     result = []
-    for product in products:
+    for (product_id, site_name, gender_val, clothing_type_val, name,
+         price_numeric, price_date, colors, image_url) in cursor:
         # Parse colors
         colors_list = []
-        if product['colors']:
+        if colors:
             try:
-                colors_list = json.loads(product['colors'])
+                colors_list = json.loads(colors)
             except:
                 colors_list = []
 
@@ -264,36 +439,59 @@ def get_products(
             colors_list = ["Unknown"]
 
         # Map gender to clothingType
-        gender_lower = product['gender'].lower() if product['gender'] else ""
+        gender_lower = gender_val.lower() if gender_val else ""
         clothing_type_mapped = "men" if gender_lower == "men" else "women"
 
-        result.append(ScrapedItem(
-            id=str(product['id']),
-            competitor=map_site_name(product['site']),
-            clothingType=clothing_type_mapped,
-            clothingSubtype=product['clothing_type'] or "Unknown",
-            name=product['name'] or "Unknown Product",
-            price=product['price_numeric'] or 0.0,
-            colors=colors_list,
-            imageUrl=product['image_url'] if product['image_url'] else None,
-            dateScraped=product['price_date'][:10] if product['price_date'] else datetime.now().strftime("%Y-%m-%d")
-        ))
-
-    conn.close()
-
-    return PaginatedResponse(
-        items=result,
-        total=total,
-        page=page,
-        page_size=page_size,
-        total_pages=total_pages
-    )
+        # Plain dicts shaped like ScrapedItem - returned directly so FastAPI
+        # skips per-item validation and jsonable_encoder
+        result.append({
+            "id": str(product_id),
+            "competitor": map_site_name(site_name),
+            "clothingType": clothing_type_mapped,
+            "clothingSubtype": clothing_type_val or "Unknown",
+            "name": name or "Unknown Product",
+            "price": price_numeric or 0.0,
+            "colors": colors_list,
+            "imageUrl": image_url if image_url else None,
+            "dateScraped": price_date[:10] if price_date else today
+        })
+
+    return {
+        "items": result,
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "total_pages": total_pages
+    }
 
 
-@app.get("/api/price-history/{product_id}", response_model=PriceHistoryItem)
-def get_price_history(product_id: int):
-    """Get price history for a specific product."""
-    conn = get_db()
+@app.get("/api/products", response_model=PaginatedResponse)
+async def get_products(
+    site: Optional[str] = None,
+    gender: Optional[str] = None,
+    clothing_type: Optional[str] = None,
+    page: int = 1,
+    page_size: int = 10,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    conn: sqlite3.Connection = Depends(get_db)
+):
+    """
+    Get all products with latest price and color data (paginated).
+
+    Query params:
+    - site: Filter by site (fashionbug/coolplanet)
+    - gender: Filter by gender (men/women)
+    - clothing_type: Filter by clothing type
+    - page: Page number (default 1)
+    - page_size: Items per page (default 10)
+    """
+    data = await asyncio.to_thread(_fetch_products, conn, site, gender, clothing_type, page, page_size, start_date, end_date)
+    return FastJSONResponse(content=data)
+
+
+def _fetch_price_history(conn: sqlite3.Connection, product_id: int):
+    """Blocking query work for get_price_history(); runs in a worker thread."""
     cursor = conn.cursor()
 
     # Get product info
@@ -328,9 +526,8 @@ def get_price_history(product_id: int):
         for p in prices
     ]
 
-    conn.close()
-
-    return PriceHistoryItem(
+    # Built from our own rows, so skip re-validating every price entry
+    return PriceHistoryItem.model_construct(
         product_id=product['id'],
         product_name=product['name'] or "Unknown",
         product_url=product['product_url'],
@@ -339,69 +536,77 @@ def get_price_history(product_id: int):
     )
 
 
-@app.get("/api/color-trends", response_model=List[ColorTrendItem])
-def get_color_trends(site: Optional[str] = None):
-    """Get color distribution across all products."""
-    conn = get_db()
+@app.get("/api/price-history/{product_id}", response_model=PriceHistoryItem)
+async def get_price_history(product_id: int, conn: sqlite3.Connection = Depends(get_db)):
+    """Get price history for a specific product."""
+    return await asyncio.to_thread(_fetch_price_history, conn, product_id)
+
+
+def _fetch_color_trends(conn: sqlite3.Connection, site: Optional[str]):
+    """Blocking query work for get_color_trends(); runs in a worker thread."""
     cursor = conn.cursor()
 
-    # Get all color data
+    # Count the colors of each product's latest color history in SQL
     query = """
-        SELECT p.site, p.clothing_type, ch.colors
+        SELECT
+            chi.color AS color,
+            p.site,
+            COALESCE(NULLIF(p.clothing_type, ''), 'unknown') AS clothing_type,
+            COUNT(*) AS count
         FROM products p
         JOIN color_history ch ON p.id = ch.product_id
+        JOIN color_history_items chi ON chi.color_history_id = ch.id
         WHERE p.is_active = 1
           AND ch.id IN (SELECT MAX(id) FROM color_history GROUP BY product_id)
     """
 
     params = []
     if site:
-        if site.lower() == "fashionbug":
-            query += " AND (LOWER(p.site) LIKE '%fashion%' OR LOWER(p.site) LIKE '%bug%')"
-        elif site.lower() == "coolplanet":
-            query += " AND (LOWER(p.site) LIKE '%cool%' OR LOWER(p.site) LIKE '%planet%')"
+        query += " AND p.site_key = ?"
+        params.append(site.lower())
+
+    query += """
+        GROUP BY chi.color, p.site, clothing_type
+        ORDER BY count DESC
+    """
 
     cursor.execute(query, params)
-    results = cursor.fetchall()
 
-    # Count colors
+    # Merge raw site spellings that map to the same frontend site name
     color_counts = {}
+    for row in cursor.fetchall():
+        key = (row['color'], map_site_name(row['site']), row['clothing_type'])
+        color_counts[key] = color_counts.get(key, 0) + row['count']
 
-    for row in results:
-        site_name = map_site_name(row['site'])
-        clothing_type = row['clothing_type'] or "unknown"
-
-        if row['colors']:
-            try:
-                colors = json.loads(row['colors'])
-                for color in colors:
-                    key = (color, site_name, clothing_type)
-                    color_counts[key] = color_counts.get(key, 0) + 1
-            except:
-                continue
-
-    # Convert to response format
+    # Convert to response format (plain dicts shaped like ColorTrendItem)
     result = [
-        ColorTrendItem(
-            color=color,
-            count=count,
-            site=site_name,
-            clothing_type=clothing_type
-        )
+        {
+            "color": color,
+            "count": count,
+            "site": site_name,
+            "clothing_type": clothing_type
+        }
         for (color, site_name, clothing_type), count in color_counts.items()
     ]
 
     # Sort by count descending
-    result.sort(key=lambda x: x.count, reverse=True)
+    result.sort(key=lambda x: x["count"], reverse=True)
 
-    conn.close()
     return result
 
 
-@app.get("/api/filter-options", response_model=FilterOptions)
-def get_filter_options():
-    """Get available filter options based on actual data."""
-    conn = get_db()
+@app.get("/api/color-trends", response_model=List[ColorTrendItem])
+async def get_color_trends(
+    request: Request,
+    site: Optional[str] = None,
+    conn: sqlite3.Connection = Depends(get_db)
+):
+    """Get color distribution across all products."""
+    return await _cached_response(_COLOR_TRENDS_CACHE, request, _fetch_color_trends, conn, site)
+
+
+def _fetch_filter_options(conn: sqlite3.Connection):
+    """Blocking query work for get_filter_options(); runs in a worker thread."""
     cursor = conn.cursor()
 
     # Get unique sites (competitors)
@@ -432,25 +637,28 @@ def get_filter_options():
     """)
     clothing_subtypes = [row['clothing_type'] for row in cursor.fetchall()]
 
-    conn.close()
+    return {
+        "competitors": sorted(competitors),
+        "clothing_types": sorted(clothing_types),
+        "clothing_subtypes": sorted(clothing_subtypes)
+    }
 
-    return FilterOptions(
-        competitors=sorted(competitors),
-        clothing_types=sorted(clothing_types),
-        clothing_subtypes=sorted(clothing_subtypes)
-    )
 
+@app.get("/api/filter-options", response_model=FilterOptions)
+async def get_filter_options(request: Request, conn: sqlite3.Connection = Depends(get_db)):
+    """Get available filter options based on actual data."""
+    return await _cached_response(_FILTER_OPTIONS_CACHE, request, _fetch_filter_options, conn)
 
-@app.get("/api/price-trends")
-def get_price_trends(
-    site: Optional[str] = None,
-    gender: Optional[str] = None,
-    clothing_type: Optional[str] = None,
-    start_date: Optional[str] = None,
-    end_date: Optional[str] = None
+
+def _fetch_price_trends(
+    conn: sqlite3.Connection,
+    site: Optional[str],
+    gender: Optional[str],
+    clothing_type: Optional[str],
+    start_date: Optional[str],
+    end_date: Optional[str]
 ):
-    """Get price trends over time."""
-    conn = get_db()
+    """Blocking query work for get_price_trends(); runs in a worker thread."""
     cursor = conn.cursor()
 
     # Build query with filters
@@ -471,10 +679,8 @@ def get_price_trends(
     params = []
 
     if site:
-        if site.lower() == "fashionbug":
-            query += " AND (LOWER(p.site) LIKE '%fashion%' OR LOWER(p.site) LIKE '%bug%')"
-        elif site.lower() == "coolplanet":
-            query += " AND (LOWER(p.site) LIKE '%cool%' OR LOWER(p.site) LIKE '%planet%')"
+        query += " AND p.site_key = ?"
+        params.append(site.lower())
 
     if gender:
         query += " AND LOWER(p.gender) = ?"
@@ -513,18 +719,30 @@ def get_price_trends(
         for row in results
     ]
 
-    conn.close()
     return data
 
 
-@app.get("/api/product-timeline")
-def get_product_timeline(
+@app.get("/api/price-trends")
+async def get_price_trends(
     site: Optional[str] = None,
     gender: Optional[str] = None,
-    clothing_type: Optional[str] = None
+    clothing_type: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    conn: sqlite3.Connection = Depends(get_db)
 ):
-    """Get product count by date first seen for launch timeline."""
-    conn = get_db()
+    """Get price trends over time."""
+    data = await asyncio.to_thread(_fetch_price_trends, conn, site, gender, clothing_type, start_date, end_date)
+    return FastJSONResponse(content=data)
+
+
+def _fetch_product_timeline(
+    conn: sqlite3.Connection,
+    site: Optional[str],
+    gender: Optional[str],
+    clothing_type: Optional[str]
+):
+    """Blocking query work for get_product_timeline(); runs in a worker thread."""
     cursor = conn.cursor()
 
     # Build query with filters - count products by when they were first seen
@@ -541,10 +759,8 @@ def get_product_timeline(
     params = []
 
     if site:
-        if site.lower() == "fashionbug":
-            query += " AND (LOWER(p.site) LIKE '%fashion%' OR LOWER(p.site) LIKE '%bug%')"
-        elif site.lower() == "coolplanet":
-            query += " AND (LOWER(p.site) LIKE '%cool%' OR LOWER(p.site) LIKE '%planet%')"
+        query += " AND p.site_key = ?"
+        params.append(site.lower())
 
     if gender:
         query += " AND LOWER(p.gender) = ?"
@@ -600,45 +816,62 @@ def get_product_timeline(
                 item[formatted_key] = count
         data.append(item)
 
-    conn.close()
     return data
 
 
-@app.get("/api/color-price-trends")
-def get_color_price_trends(
+@app.get("/api/product-timeline")
+async def get_product_timeline(
     site: Optional[str] = None,
     gender: Optional[str] = None,
     clothing_type: Optional[str] = None,
-    start_date: Optional[str] = None,
-    end_date: Optional[str] = None
+    conn: sqlite3.Connection = Depends(get_db)
+):
+    """Get product count by date first seen for launch timeline."""
+    data = await asyncio.to_thread(_fetch_product_timeline, conn, site, gender, clothing_type)
+    return FastJSONResponse(content=data)
+
+
+def _fetch_color_price_trends(
+    conn: sqlite3.Connection,
+    site: Optional[str],
+    gender: Optional[str],
+    clothing_type: Optional[str],
+    start_date: Optional[str],
+    end_date: Optional[str]
 ):
-    """Get average price trends for each color category over time."""
-    conn = get_db()
+    """Blocking query work for get_color_price_trends(); runs in a worker thread."""
     cursor = conn.cursor()
 
-    # Build query to get colors and prices over time
+    # Without a start date, bound the scan to a window ending at end_date
+    # (or the latest scrape) so the work doesn't grow with the whole history
+    if not start_date:
+        cursor.execute(
+            "SELECT DATE(COALESCE(?, MAX(scraped_at)), ?) FROM price_history",
+            (end_date, f"-{COLOR_PRICE_TRENDS_DEFAULT_DAYS} days")
+        )
+        start_date = cursor.fetchone()[0]
+
+    # Bucket each row's first color by its highest-priority matching keyword
+    # from color_categories, then average prices per date and category in SQL
     query = """
-        SELECT
-            DATE(ph.scraped_at) as date,
-            ch.colors,
-            p.site,
-            p.gender,
-            p.clothing_type,
-            ph.price_numeric
-        FROM products p
-        JOIN price_history ph ON p.id = ph.product_id
-        JOIN color_history ch ON p.id = ch.product_id
-        WHERE p.is_active = 1
-          AND DATE(ph.scraped_at) = DATE(ch.scraped_at)
+        WITH rows AS (
+            SELECT
+                DATE(ph.scraped_at) AS date,
+                LOWER(chi.color) AS color,
+                ph.price_numeric
+            FROM products p
+            JOIN price_history ph ON p.id = ph.product_id
+            JOIN color_history ch ON p.id = ch.product_id
+            JOIN color_history_items chi ON chi.color_history_id = ch.id AND chi.position = 0
+            WHERE p.is_active = 1
+              AND DATE(ph.scraped_at) = DATE(ch.scraped_at)
     """
 
     params = []
 
     if site:
-        if site.lower() == "fashionbug":
-            query += " AND (LOWER(p.site) LIKE '%fashion%' OR LOWER(p.site) LIKE '%bug%')"
-        elif site.lower() == "coolplanet":
-            query += " AND (LOWER(p.site) LIKE '%cool%' OR LOWER(p.site) LIKE '%planet%')"
+        query += " AND p.site_key = ?"
+        params.append(site.lower())
 
     if gender:
         query += " AND LOWER(p.gender) = ?"
@@ -656,92 +889,55 @@ def get_color_price_trends(
         query += " AND DATE(ph.scraped_at) <= ?"
         params.append(end_date)
 
-    query += " ORDER BY DATE(ph.scraped_at)"
+    query += """
+        )
+        SELECT
+            date,
+            COALESCE((
+                SELECT cc.category FROM color_categories cc
+                WHERE instr(rows.color, cc.keyword) > 0
+                ORDER BY cc.priority
+                LIMIT 1
+            ), 'Other') AS category,
+            AVG(price_numeric) AS avg_price,
+            COUNT(*) AS count
+        FROM rows
+        GROUP BY date, category
+        ORDER BY date
+    """
 
     cursor.execute(query, params)
-    results = cursor.fetchall()
 
-    # Color categorization function (same as frontend)
-    def categorize_color(color_name):
-        if not color_name:
-            return "Other"
-        color = color_name.lower()
-
-        # Black shades
-        if any(x in color for x in ["black", "ebony", "jet", "onyx", "coal", "raisin", "licorice"]):
-            return "Black"
-        # White shades
-        elif any(x in color for x in ["white", "ivory", "cream", "beige", "eggshell", "ghost"]):
-            return "White"
-        # Gray shades
-        elif any(x in color for x in ["gray", "grey", "silver", "ash", "slate", "charcoal", "grullo", "taupe"]):
-            return "Gray"
-        # Red shades
-        elif any(x in color for x in ["red", "crimson", "scarlet", "ruby", "burgundy", "maroon", "cardinal", "brick"]):
-            return "Red"
-        # Blue shades
-        elif any(x in color for x in ["blue", "navy", "azure", "cobalt", "sapphire", "indigo", "cerulean", "prussian", "yinmn"]):
-            return "Blue"
-        # Green shades
-        elif any(x in color for x in ["green", "olive", "emerald", "jade", "lime", "forest", "mint", "sage"]):
-            return "Green"
-        # Yellow shades
-        elif any(x in color for x in ["yellow", "gold", "amber", "lemon", "canary", "mustard", "saffron"]):
-            return "Yellow"
-        # Orange shades
-        elif any(x in color for x in ["orange", "coral", "peach", "tangerine", "apricot", "rust"]):
-            return "Orange"
-        # Purple shades
-        elif any(x in color for x in ["purple", "violet", "lavender", "plum", "mauve", "lilac", "magenta", "orchid"]):
-            return "Purple"
-        # Pink shades
-        elif any(x in color for x in ["pink", "rose", "salmon", "fuchsia", "blush"]):
-            return "Pink"
-        # Brown shades
-        elif any(x in color for x in ["brown", "tan", "khaki", "chocolate", "coffee", "mocha", "umber", "liver", "sepia"]):
-            return "Brown"
-        else:
-            return "Other"
-
-    # Aggregate by date and color category
-    color_price_by_date = {}
-
-    for row in results:
-        date = row['date']
-        price = row['price_numeric']
-
-        if row['colors']:
-            try:
-                colors = json.loads(row['colors'])
-                # Use first/top color (or second for FashionBug tops as per previous logic)
-                if colors:
-                    color = colors[0]
-                    category = categorize_color(color)
+    # One entry per date with "<Category>" and "<Category>_count" keys
+    data = []
+    date_entry = None
+    for row in cursor.fetchall():
+        if date_entry is None or date_entry['date'] != row['date']:
+            date_entry = {'date': row['date']}
+            data.append(date_entry)
+        if row['avg_price'] is not None:
+            date_entry[row['category']] = round(row['avg_price'], 2)
+            date_entry[f"{row['category']}_count"] = row['count']
 
-                    if date not in color_price_by_date:
-                        color_price_by_date[date] = {}
+    return data
 
-                    if category not in color_price_by_date[date]:
-                        color_price_by_date[date][category] = {'prices': [], 'count': 0}
 
-                    color_price_by_date[date][category]['prices'].append(price)
-                    color_price_by_date[date][category]['count'] += 1
-            except:
-                continue
+@app.get("/api/color-price-trends")
+async def get_color_price_trends(
+    site: Optional[str] = None,
+    gender: Optional[str] = None,
+    clothing_type: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    conn: sqlite3.Connection = Depends(get_db)
+):
+    """
+    Get average price trends for each color category over time.
 
-    # Calculate averages and format for response
-    data = []
-    for date, categories in sorted(color_price_by_date.items()):
-        date_entry = {'date': date}
-        for category, info in categories.items():
-            if info['prices']:
-                avg_price = sum(info['prices']) / len(info['prices'])
-                date_entry[category] = round(avg_price, 2)
-                date_entry[f"{category}_count"] = info['count']
-        data.append(date_entry)
-
-    conn.close()
-    return data
+    Without start_date, covers the last 90 days up to end_date or the latest scrape.
+    """
+    data = await asyncio.to_thread(_fetch_color_price_trends, conn, site, gender, clothing_type, start_date, end_date)
+    return FastJSONResponse(content=data)
 
 
 @app.post("/api/run-scraping")
@@ -797,6 +993,8 @@ async def run_scraping():
             await process.wait()
 
             if process.returncode == 0:
+                # New data was imported - don't serve stale cached responses
+                flush_response_caches()
                 yield f"data: {json.dumps({'step': 'complete', 'message': 'Scraping pipeline completed successfully!', 'status': 'success'})}\n\n"
             else:
                 yield f"data: {json.dumps({'step': 'error', 'message': f'Pipeline failed with exit code {process.returncode}', 'status': 'error'})}\n\n"
@@ -807,49 +1005,61 @@ async def run_scraping():
     return StreamingResponse(event_stream(), media_type="text/event-stream")
 
 
-@app.get("/api/stats", response_model=StatsResponse)
-def get_stats():
-    """Get database statistics."""
-    conn = get_db()
+def _fetch_stats(conn: sqlite3.Connection):
+    """Blocking query work for get_stats(); runs in a worker thread."""
     cursor = conn.cursor()
 
-    # Total products
-    cursor.execute("SELECT COUNT(*) FROM products WHERE is_active = 1")
-    total_products = cursor.fetchone()[0]
-
-    # Total sessions
-    cursor.execute("SELECT COUNT(*) FROM scraping_sessions")
-    total_sessions = cursor.fetchone()[0]
-
-    # By site
+    # Counts, per-site breakdown and price range in one round trip, with
+    # products scanned once for both the total and the per-site counts
     cursor.execute("""
-        SELECT site, COUNT(*) as count
-        FROM products
-        WHERE is_active = 1
-        GROUP BY site
+        WITH by_site AS (
+            SELECT site, COUNT(*) AS count
+            FROM products
+            WHERE is_active = 1
+            GROUP BY site
+        ),
+        price_range AS (
+            SELECT MIN(price_numeric) AS min_price, MAX(price_numeric) AS max_price, AVG(price_numeric) AS avg_price
+            FROM price_history
+            WHERE price_numeric IS NOT NULL
+        )
+        SELECT
+            (SELECT COALESCE(SUM(count), 0) FROM by_site) AS total_products,
+            (SELECT COUNT(*) FROM scraping_sessions) AS total_sessions,
+            (SELECT json_group_object(site, count) FROM by_site) AS sites,
+            min_price,
+            max_price,
+            avg_price
+        FROM price_range
     """)
-    sites = {row['site']: row['count'] for row in cursor.fetchall()}
+    row = cursor.fetchone()
+    total_products = row['total_products']
+    total_sessions = row['total_sessions']
+    sites = orjson.loads(row['sites'])
 
-    # Price range
-    cursor.execute("""
-        SELECT MIN(price_numeric) as min_price, MAX(price_numeric) as max_price, AVG(price_numeric) as avg_price
-        FROM price_history
-        WHERE price_numeric IS NOT NULL
-    """)
-    price_data = cursor.fetchone()
-
-    conn.close()
-
-    return StatsResponse(
-        total_products=total_products,
-        total_sessions=total_sessions,
-        sites=sites,
-        price_range={
-            "min": price_data['min_price'] or 0,
-            "max": price_data['max_price'] or 0,
-            "avg": price_data['avg_price'] or 0
+    return {
+        "total_products": total_products,
+        "total_sessions": total_sessions,
+        "sites": sites,
+        "price_range": {
+            "min": row['min_price'] or 0,
+            "max": row['max_price'] or 0,
+            "avg": row['avg_price'] or 0
         }
-    )
+    }
+
+
+@app.get("/api/stats", response_model=StatsResponse)
+async def get_stats(request: Request, conn: sqlite3.Connection = Depends(get_db)):
+    """Get database statistics."""
+    return await _cached_response(_STATS_CACHE, request, _fetch_stats, conn)
+
+
+@app.post("/api/cache/flush")
+async def flush_cache():
+    """Drop cached responses so the next requests read fresh data."""
+    flush_response_caches()
+    return {"status": "flushed"}
 
 
 # Mount static files for frontend (if directory exists)
@@ -3,10 +3,23 @@ Clean price data in JSON files.
 Extract clean numeric price from messy scraped price strings.
 """
 
-import json
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import orjson
+import pandas as pd
+
+
+# Single pass over the string for "Rs 1,850.00", "LKR 1,850.00" or "1,850.00 Rs"
+_PRICE = re.compile(
+    r'(?:Rs|LKR)\s*(?P<num>[\d,]+\.?\d*)'   # Rs 1,850.00 / LKR 1,850.00
+    r'|(?P<num2>[\d,]+\.?\d*)\s*Rs',         # 1,850.00 Rs
+    re.IGNORECASE
+)
+_FALLBACK = re.compile(r'[\d,]+\.?\d+')
+
 
 def clean_price(price_str):
     """
@@ -24,34 +37,37 @@ def clean_price(price_str):
     # Remove newlines and extra whitespace
     price_str = ' '.join(price_str.split())
 
-    # Pattern to match prices like "Rs 1,850.00" or "Rs 1850.00"
-    # This will match the first occurrence of a price pattern
-    patterns = [
-        r'Rs\s*[\d,]+\.?\d*',  # Rs 1,850.00 or Rs 1850
-        r'LKR\s*[\d,]+\.?\d*',  # LKR 1,850.00
-        r'[\d,]+\.?\d*\s*Rs',   # 1,850.00 Rs
-    ]
-
-    for pattern in patterns:
-        match = re.search(pattern, price_str, re.IGNORECASE)
-        if match:
-            price = match.group(0).strip()
-
-            # Standardize format: "Rs 1,850.00"
-            # Extract just the number part
-            number_match = re.search(r'[\d,]+\.?\d*', price)
-            if number_match:
-                number = number_match.group(0)
-                return f"Rs {number}"
+    # Match the first occurrence of a price pattern
+    match = _PRICE.search(price_str)
+    if match:
+        # Standardize format: "Rs 1,850.00"
+        return f"Rs {match.group('num') or match.group('num2')}"
 
     # If no pattern matched, try to extract any number
-    number_match = re.search(r'[\d,]+\.?\d+', price_str)
+    number_match = _FALLBACK.search(price_str)
     if number_match:
         return f"Rs {number_match.group(0)}"
 
     return None
 
 
+def clean_price_series(prices):
+    """
+    Vectorized clean_price over a pandas Series of raw price strings.
+
+    Args:
+        prices: Series of raw price strings (non-strings are treated as missing)
+
+    Returns:
+        Series of clean price strings, NaN where no price could be extracted
+    """
+    # \s* in the patterns already spans newlines, so no whitespace collapsing needed
+    matched = prices.str.extract(_PRICE)
+    number = matched['num'].fillna(matched['num2'])
+    number = number.fillna(prices.str.extract(f"({_FALLBACK.pattern})", expand=False))
+    return 'Rs ' + number
+
+
 def clean_prices_in_file(input_file, output_file=None):
     """
     Clean all prices in a JSON file.
@@ -66,36 +82,35 @@ def clean_prices_in_file(input_file, output_file=None):
     print(f"\nCleaning prices in {input_file}...")
 
     # Load data
-    with open(input_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = orjson.loads(Path(input_file).read_bytes())
 
     products = data.get('products', [])
     cleaned_count = 0
     failed_count = 0
 
-    # Clean each product's price
-    for product in products:
-        original_price = product.get('price')
-
-        if original_price:
-            cleaned_price = clean_price(original_price)
-
-            if cleaned_price:
+    # Clean all prices in one vectorized pass per column
+    prices = pd.Series([p.get('price') for p in products], dtype=object)
+    original_prices = pd.Series([p.get('original_price') for p in products], dtype=object)
+    cleaned_prices = clean_price_series(prices)
+    cleaned_original_prices = clean_price_series(original_prices)
+
+    for product, price, cleaned_price, cleaned_original in zip(
+        products, prices, cleaned_prices, cleaned_original_prices
+    ):
+        if price:
+            if isinstance(cleaned_price, str):
                 product['price'] = cleaned_price
                 cleaned_count += 1
             else:
-                print(f"  Warning: Could not clean price: {original_price[:50]}...")
+                print(f"  Warning: Could not clean price: {price[:50]}...")
                 failed_count += 1
 
         # Also clean original_price if it exists
-        if product.get('original_price'):
-            cleaned = clean_price(product.get('original_price'))
-            if cleaned:
-                product['original_price'] = cleaned
+        if product.get('original_price') and isinstance(cleaned_original, str):
+            product['original_price'] = cleaned_original
 
-    # Save cleaned data
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    # Save cleaned data (compact UTF-8; pretty-printing dominates dump time)
+    Path(output_file).write_bytes(orjson.dumps(data))
 
     print(f"[+] Cleaned {cleaned_count} prices")
     if failed_count > 0:
@@ -103,6 +118,11 @@ def clean_prices_in_file(input_file, output_file=None):
     print(f"[+] Saved to: {output_file}")
 
 
+def _clean_one(job):
+    """Process-pool entry point: clean one (input_file, output_file) pair."""
+    clean_prices_in_file(*job)
+
+
 def clean_all_files(directory, output_directory=None):
     """
     Clean prices in all JSON files in a directory.
@@ -123,15 +143,17 @@ def clean_all_files(directory, output_directory=None):
     print("="*60)
     print(f"Found {len(json_files)} JSON files to process\n")
 
-    for json_file in json_files:
-        if output_directory:
-            output_path = Path(output_directory)
-            output_path.mkdir(exist_ok=True)
-            output_file = output_path / json_file.name
-        else:
-            output_file = json_file
-
-        clean_prices_in_file(json_file, output_file)
+    if output_directory:
+        output_path = Path(output_directory)
+        output_path.mkdir(exist_ok=True)
+        jobs = [(json_file, output_path / json_file.name) for json_file in json_files]
+    else:
+        jobs = [(json_file, json_file) for json_file in json_files]
+
+    # Files are independent and cleaning is CPU-bound, so fan out across processes
+    workers = min(len(jobs), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(_clean_one, jobs))
 
     print(f"\n{'='*60}")
     print("All files processed!")
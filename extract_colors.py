@@ -13,14 +13,18 @@ http://www.tara.tcd.ie/handle/2262/93334
 """
 
 import json
+import re
+import hashlib
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 from PIL import Image
 from io import BytesIO
 import numpy as np
-from sklearn.cluster import KMeans
 from skimage import color as skcolor
 import cv2
-from collections import Counter
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import sys
 import os
 from pathlib import Path
@@ -30,6 +34,52 @@ sys.path.append(str(Path(__file__).parent / 'FashionColor-0'))
 from color_names import ColorNames
 
 
+# Keep-alive connections to the image hosts, shared by download threads
+session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=3)
+session.mount('https://', _adapter)
+session.mount('http://', _adapter)
+
+# Where downloaded images are cached by URL between runs
+DEFAULT_IMAGE_CACHE_DIR = '.cache/images'
+
+
+def fetch_image_bytes(image_url, timeout=10, image_cache_dir=DEFAULT_IMAGE_CACHE_DIR):
+    """
+    Download raw image bytes from URL.
+
+    Args:
+        image_url: URL of the image
+        timeout: Request timeout in seconds
+        image_cache_dir: Directory for caching downloaded images by URL, or None to disable
+
+    Returns:
+        Response body bytes or None if failed
+    """
+    # Serve repeat runs from the on-disk cache, keyed by URL
+    cache_file = None
+    if image_cache_dir:
+        cache_file = Path(image_cache_dir) / hashlib.sha1(image_url.encode('utf-8')).hexdigest()
+        if cache_file.exists():
+            return cache_file.read_bytes()
+
+    try:
+        response = session.get(image_url, timeout=timeout)
+        response.raise_for_status()
+    except Exception as e:
+        print(f"Failed to download {image_url}: {e}")
+        return None
+
+    if cache_file:
+        # Write then rename so concurrent downloads never see a partial file
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_file.write_bytes(response.content)
+        os.replace(tmp_file, cache_file)
+
+    return response.content
+
+
 class FashionColorExtractor:
     """
     Extract dominant colors from fashion product images using FashionColor-0 methodology.
@@ -40,8 +90,15 @@ class FashionColorExtractor:
     3. Combine detected colors based on hue scores and probability
     """
 
+    # Clothing-type keywords for choosing the crop region, compiled once
+    _UPPER_BODY_KEYWORDS = re.compile('shirt|t-shirt|tshirt|top|blouse|jacket|coat|hoodie|sweater')
+    _LOWER_BODY_KEYWORDS = re.compile('trouser|pant|jean|short|skirt|legging')
+    _FULL_BODY_KEYWORDS = re.compile('dress|gown|saree|jumpsuit|overall')
+    _FOOTWEAR_KEYWORDS = re.compile('shoe|footwear|sandal|boot|sneaker')
+
     def __init__(self, num_colors=13, hue_threshold=15, probability_threshold=0.05,
-                 remove_background=True):
+                 remove_background=True, grabcut_max_size=300, grabcut_iterations=3,
+                 max_sample_pixels=5000, image_cache_dir=DEFAULT_IMAGE_CACHE_DIR):
         """
         Initialize color extractor.
 
@@ -50,13 +107,26 @@ class FashionColorExtractor:
             hue_threshold: Threshold for combining similar hues in degrees (default: 15)
             probability_threshold: Minimum probability for a color to be included (default: 0.05)
             remove_background: Whether to apply background removal (default: True)
+            grabcut_max_size: Longest image side in pixels to run GrabCut at (default: 300)
+            grabcut_iterations: Number of GrabCut iterations per image (default: 3)
+            max_sample_pixels: Maximum number of pixels to cluster per image (default: 5000)
+            image_cache_dir: Directory for caching downloaded images by URL, or None to disable
+                (default: .cache/images)
         """
         self.num_colors = num_colors
         self.hue_threshold = hue_threshold
         self.probability_threshold = probability_threshold
         self.remove_background = remove_background
+        self.grabcut_max_size = grabcut_max_size
+        self.grabcut_iterations = grabcut_iterations
+        self.max_sample_pixels = max_sample_pixels
+        self.image_cache_dir = Path(image_cache_dir) if image_cache_dir else None
         self.color_namer = ColorNames()
 
+        # GrabCut background/foreground GMM buffers, reset and reused per image
+        self._bgd_model = np.zeros((1, 65), np.float64)
+        self._fgd_model = np.zeros((1, 65), np.float64)
+
     def download_image(self, image_url, timeout=10):
         """
         Download image from URL.
@@ -68,13 +138,42 @@ class FashionColorExtractor:
         Returns:
             PIL Image object or None if failed
         """
+        content = self.fetch_image_bytes(image_url, timeout)
+        if content is None:
+            return None
+        return self.decode_image(content)
+
+    def fetch_image_bytes(self, image_url, timeout=10):
+        """
+        Download raw image bytes from URL.
+
+        Args:
+            image_url: URL of the image
+            timeout: Request timeout in seconds
+
+        Returns:
+            Response body bytes or None if failed
+        """
+        return fetch_image_bytes(image_url, timeout, self.image_cache_dir)
+
+    def decode_image(self, content):
+        """
+        Decode downloaded image bytes.
+
+        Args:
+            content: Raw image bytes
+
+        Returns:
+            PIL Image object (RGB) or None if failed
+        """
         try:
-            response = requests.get(image_url, timeout=timeout)
-            response.raise_for_status()
-            img = Image.open(BytesIO(response.content))
-            return img.convert('RGB')
+            img = Image.open(BytesIO(content))
+            # Let the JPEG decoder scale down by 1/2, 1/4 or 1/8 while decoding,
+            # never below what GrabCut is run at
+            img.draft('RGB', (self.grabcut_max_size, self.grabcut_max_size))
+            return img if img.mode == 'RGB' else img.convert('RGB')
         except Exception as e:
-            print(f"Failed to download {image_url}: {e}")
+            print(f"Failed to decode image: {e}")
             return None
 
     def _crop_by_clothing_type(self, img_array, clothing_type):
@@ -92,22 +191,22 @@ class FashionColorExtractor:
         clothing_type_lower = (clothing_type or '').lower()
 
         # Define crop regions based on clothing type
-        if any(keyword in clothing_type_lower for keyword in ['shirt', 't-shirt', 'tshirt', 'top', 'blouse', 'jacket', 'coat', 'hoodie', 'sweater']):
+        if self._UPPER_BODY_KEYWORDS.search(clothing_type_lower):
             # Upper body: top 65% of image
             cropped = img_array[:int(height * 0.65), :]
             print(f"    Cropping for upper body ({clothing_type}): top 65%")
 
-        elif any(keyword in clothing_type_lower for keyword in ['trouser', 'pant', 'jean', 'short', 'skirt', 'legging']):
+        elif self._LOWER_BODY_KEYWORDS.search(clothing_type_lower):
             # Lower body: bottom 65% of image, starting from 35%
             cropped = img_array[int(height * 0.35):, :]
             print(f"    Cropping for lower body ({clothing_type}): bottom 65%")
 
-        elif any(keyword in clothing_type_lower for keyword in ['dress', 'gown', 'saree', 'jumpsuit', 'overall']):
+        elif self._FULL_BODY_KEYWORDS.search(clothing_type_lower):
             # Full body: use entire image
             cropped = img_array
             print(f"    Using full image ({clothing_type})")
 
-        elif any(keyword in clothing_type_lower for keyword in ['shoe', 'footwear', 'sandal', 'boot', 'sneaker']):
+        elif self._FOOTWEAR_KEYWORDS.search(clothing_type_lower):
             # Footwear: bottom 25% of image
             cropped = img_array[int(height * 0.75):, :]
             print(f"    Cropping for footwear ({clothing_type}): bottom 25%")
@@ -121,6 +220,25 @@ class FashionColorExtractor:
 
         return cropped
 
+    def _has_studio_background(self, img_array, patch=20):
+        """
+        Check whether the image corners are a uniform near-white background.
+
+        Args:
+            img_array: Numpy array of image (RGB)
+            patch: Side of the square corner patches to sample, in pixels
+
+        Returns:
+            True if the corner pixels are bright (mean > 240) and flat (std < 10)
+        """
+        corners = np.concatenate([
+            img_array[:patch, :patch].reshape(-1, 3),
+            img_array[:patch, -patch:].reshape(-1, 3),
+            img_array[-patch:, :patch].reshape(-1, 3),
+            img_array[-patch:, -patch:].reshape(-1, 3),
+        ])
+        return corners.mean() > 240 and corners.std() < 10
+
     def _remove_background_grabcut(self, img_array, clothing_type=None):
         """
         Remove background from image using GrabCut algorithm.
@@ -130,27 +248,48 @@ class FashionColorExtractor:
             clothing_type: Optional clothing type to focus on specific region
 
         Returns:
-            Tuple of (masked_image, mask)
+            Tuple of (masked_image, mask), downscaled to at most grabcut_max_size
         """
         # Crop image based on clothing type first
         if clothing_type:
             img_array = self._crop_by_clothing_type(img_array, clothing_type)
 
-        # Initialize mask
-        mask = np.zeros(img_array.shape[:2], np.uint8)
+        # GrabCut cost grows with pixel count; K-means only needs a color
+        # sample, so segment (and return) a downscaled copy
+        scale = self.grabcut_max_size / max(img_array.shape[:2])
+        if scale < 1:
+            img_array = cv2.resize(img_array, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        height, width = img_array.shape[:2]
+
+        # Uniform near-white studio background: a brightness threshold already
+        # separates the product, so skip GrabCut
+        if self._has_studio_background(img_array):
+            gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
+            mask2 = (gray < 235).astype(np.uint8)
+            return img_array * mask2[:, :, np.newaxis], mask2
+
+        # Too small to segment meaningfully: use the whole (cropped) image
+        if height < 100 or width < 100:
+            mask2 = np.ones((height, width), dtype='uint8')
+            return img_array * mask2[:, :, np.newaxis], mask2
 
         # Background and foreground models for GrabCut
-        bgd_model = np.zeros((1, 65), np.float64)
-        fgd_model = np.zeros((1, 65), np.float64)
+        bgd_model = self._bgd_model
+        fgd_model = self._fgd_model
+        bgd_model.fill(0)
+        fgd_model.fill(0)
 
-        # Define rectangle around the object (assume center region contains clothing)
-        height, width = img_array.shape[:2]
-        rect = (int(width * 0.05), int(height * 0.05),
-                int(width * 0.90), int(height * 0.90))
+        # Seed the mask from the crop: the region already chosen for this
+        # clothing type is probable foreground apart from a 5% border that is
+        # definite background (assume center region contains clothing)
+        mask = np.full((height, width), cv2.GC_BGD, np.uint8)
+        mask[int(height * 0.05):int(height * 0.95), int(width * 0.05):int(width * 0.95)] = cv2.GC_PR_FGD
 
         try:
             # Apply GrabCut
-            cv2.grabCut(img_array, mask, rect, bgd_model, fgd_model, 5, cv2.GC_INIT_WITH_RECT)
+            cv2.grabCut(img_array, mask, None, bgd_model, fgd_model,
+                        self.grabcut_iterations, cv2.GC_INIT_WITH_MASK)
 
             # Create binary mask: probable foreground and definite foreground = 1
             mask2 = np.where((mask == 2) | (mask == 0), 0, 1).astype('uint8')
@@ -177,57 +316,54 @@ class FashionColorExtractor:
         """
         if mask is not None:
             # Use provided mask
-            valid_pixels = img_array[mask > 0]
+            valid_mask = mask > 0
         else:
             # Create mask based on pixel intensity
             gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
             valid_mask = (gray > 20) & (gray < 235)
-            valid_pixels = img_array[valid_mask]
 
-        # Remove very dark pixels (likely shadows/background)
-        valid_pixels = valid_pixels[np.sum(valid_pixels, axis=1) > 30]
+        # Remove very dark pixels (likely shadows/background), folded into the
+        # same mask so the pixels are gathered in a single pass
+        valid_mask &= img_array.sum(axis=2, dtype=np.uint16) > 30
 
-        return valid_pixels
+        return img_array[valid_mask]
 
     def _rgb_to_hsv(self, rgb):
         """
-        Convert RGB color to HSV color space.
+        Convert RGB colors to HSV color space in a single vectorized call.
 
         Args:
-            rgb: RGB color array (0-255)
+            rgb: Array of RGB colors (0-255), shape (N, 3)
 
         Returns:
-            HSV array (H: 0-360, S: 0-1, V: 0-1)
+            HSV array of shape (N, 3) (H: 0-360, S: 0-1, V: 0-1)
         """
-        rgb_normalized = rgb / 255.0
-        hsv = skcolor.rgb2hsv(rgb_normalized.reshape(1, 1, 3))
-        hsv = hsv.reshape(3)
-        hsv[0] *= 360  # Convert hue to degrees
+        rgb_normalized = np.asarray(rgb, dtype=np.float64) / 255.0
+        hsv = skcolor.rgb2hsv(rgb_normalized.reshape(-1, 1, 3)).reshape(-1, 3)
+        hsv[:, 0] *= 360  # Convert hue to degrees
         return hsv
 
-    def _calculate_color_probabilities(self, labels):
+    def _count_color_pixels(self, labels, n_clusters):
         """
-        Calculate probability of each color cluster.
+        Count the pixels assigned to each color cluster.
 
         Args:
             labels: Cluster labels for each pixel
+            n_clusters: Number of clusters
 
         Returns:
-            Dictionary mapping cluster ID to probability
+            Integer array of pixel counts indexed by cluster ID
         """
-        counter = Counter(labels)
-        total = len(labels)
-        probabilities = {cluster: count / total for cluster, count in counter.items()}
-        return probabilities
+        return np.bincount(labels, minlength=n_clusters).astype(np.int64)
 
-    def _combine_similar_hues(self, colors, probabilities):
+    def _combine_similar_hues(self, colors, counts):
         """
         Combine colors with similar hues based on hue threshold.
         This implements the third stage of FashionColor-0 methodology.
 
         Args:
             colors: Array of RGB colors
-            probabilities: Array of probabilities for each color
+            counts: Array of pixel counts (or any non-negative weights) for each color
 
         Returns:
             Tuple of (combined_colors, combined_probabilities)
@@ -235,60 +371,42 @@ class FashionColorExtractor:
         if len(colors) == 0:
             return [], []
 
-        # Convert to HSV to analyze hue
-        hsv_colors = np.array([self._rgb_to_hsv(c) for c in colors])
-
-        # Group colors by similar hue
-        groups = []
-        used = set()
-
-        for i in range(len(colors)):
-            if i in used:
-                continue
-
-            group = [i]
-            used.add(i)
-
-            for j in range(i + 1, len(colors)):
-                if j in used:
-                    continue
-
-                # Calculate hue difference (circular distance on color wheel)
-                hue_diff = abs(hsv_colors[i][0] - hsv_colors[j][0])
-                hue_diff = min(hue_diff, 360 - hue_diff)
-
-                # Group if hues are similar
-                if hue_diff < self.hue_threshold:
-                    group.append(j)
-                    used.add(j)
-
-            groups.append(group)
-
-        # Combine colors in each group using weighted average
-        combined_colors = []
-        combined_probs = []
-
-        for group in groups:
-            # Sum probabilities
-            group_probs = [probabilities[idx] for idx in group]
-            total_prob = sum(group_probs)
-
-            # Filter out low-probability colors
-            if total_prob < self.probability_threshold:
-                continue
+        colors = np.asarray(colors, dtype=np.float64)
+        counts = np.asarray(counts)
 
-            # Weighted average of RGB values by probability
-            weights = np.array(group_probs) / total_prob
-            combined_color = np.average([colors[idx] for idx in group], axis=0, weights=weights)
-
-            combined_colors.append(combined_color)
-            combined_probs.append(total_prob)
-
-        # Sort by probability (most dominant first)
-        if combined_colors:
-            sorted_indices = np.argsort(combined_probs)[::-1]
-            combined_colors = [combined_colors[i] for i in sorted_indices]
-            combined_probs = [combined_probs[i] for i in sorted_indices]
+        # Convert to HSV to analyze hue
+        hues = self._rgb_to_hsv(colors)[:, 0]
+
+        # Group colors by similar hue: sort by hue and split wherever the gap
+        # to the next hue reaches the threshold
+        order = np.argsort(hues, kind='stable')
+        sorted_hues = hues[order]
+        breaks = np.flatnonzero(np.diff(sorted_hues) >= self.hue_threshold) + 1
+        groups = np.split(order, breaks)
+
+        # The color wheel is circular: join the last and first groups if the
+        # gap across 360/0 degrees is also below the threshold
+        if len(groups) > 1 and sorted_hues[0] + 360 - sorted_hues[-1] < self.hue_threshold:
+            groups[0] = np.concatenate([groups.pop(), groups[0]])
+
+        # Sum counts and count-weighted RGB per group
+        grouped = np.concatenate(groups)
+        starts = np.cumsum([0] + [len(group) for group in groups[:-1]])
+        group_counts = counts[grouped]
+        total_counts = np.add.reduceat(group_counts, starts)
+        weighted_sums = np.add.reduceat(colors[grouped] * group_counts[:, np.newaxis], starts)
+
+        # Normalize to probabilities only now, and filter out low-probability colors
+        total_probs = total_counts / counts.sum()
+        keep = total_probs >= self.probability_threshold
+        total_counts = total_counts[keep]
+        total_probs = total_probs[keep]
+        weighted_sums = weighted_sums[keep]
+
+        # Weighted average of RGB values by pixel count, most dominant first
+        sorted_indices = np.argsort(total_probs)[::-1]
+        combined_colors = list(weighted_sums[sorted_indices] / total_counts[sorted_indices, np.newaxis])
+        combined_probs = list(total_probs[sorted_indices])
 
         return combined_colors, combined_probs
 
@@ -307,8 +425,8 @@ class FashionColorExtractor:
         Returns:
             List of hex color strings
         """
-        # Convert to numpy array
-        img_array = np.array(image.convert('RGB'))
+        # Convert to numpy array (decode_image already returns RGB)
+        img_array = np.asarray(image if image.mode == 'RGB' else image.convert('RGB'))
 
         # Stage 1: Background removal (if enabled)
         if self.remove_background:
@@ -325,20 +443,30 @@ class FashionColorExtractor:
             print("    Not enough valid pixels after filtering")
             return []
 
+        # A few thousand pixels are enough to estimate the dominant colors;
+        # sample with a fixed seed so each image always gives the same result
+        if len(pixels) > self.max_sample_pixels:
+            rng = np.random.default_rng(42)
+            pixels = pixels[rng.choice(len(pixels), self.max_sample_pixels, replace=False)]
+
         # Adjust number of clusters if needed
         n_clusters = min(self.num_colors, len(pixels))
 
-        # Stage 2: Cluster colors using k-means
-        kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10, max_iter=300)
-        labels = kmeans.fit_predict(pixels)
-        cluster_colors = kmeans.cluster_centers_
+        # Stage 2: Cluster colors using k-means (OpenCV's native implementation,
+        # seeded so repeated runs give the same clusters)
+        cv2.setRNGSeed(42)
+        criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 20, 1.0)
+        _, labels, cluster_colors = cv2.kmeans(
+            pixels.astype(np.float32), n_clusters, None, criteria, 3, cv2.KMEANS_PP_CENTERS
+        )
+        labels = labels.ravel()
+        cluster_colors = cluster_colors.astype(np.float64)
 
-        # Calculate probabilities
-        prob_dict = self._calculate_color_probabilities(labels)
-        probabilities = np.array([prob_dict[i] for i in range(len(cluster_colors))])
+        # Count pixels per cluster
+        counts = self._count_color_pixels(labels, len(cluster_colors))
 
         # Stage 3: Combine similar hues
-        final_colors, final_probs = self._combine_similar_hues(cluster_colors, probabilities)
+        final_colors, final_probs = self._combine_similar_hues(cluster_colors, counts)
 
         # Convert to hex
         hex_colors = []
@@ -359,6 +487,13 @@ class FashionColorExtractor:
         Returns:
             List of color names
         """
+        # Name all of an image's colors in one batched lookup
+        try:
+            return self.color_namer.get_color_names(hex_colors)
+        except Exception:
+            pass
+
+        # Fall back to one lookup per color to skip only the bad entries
         color_names = []
         for hex_color in hex_colors:
             try:
@@ -385,6 +520,19 @@ class FashionColorExtractor:
         if image is None:
             return []
 
+        return self.extract_colors_from_image(image, clothing_type)
+
+    def extract_colors_from_image(self, image, clothing_type=None):
+        """
+        Extract color names from a downloaded product image.
+
+        Args:
+            image: PIL Image object
+            clothing_type: Type of clothing to focus extraction on (e.g., 'T-Shirt', 'Trousers')
+
+        Returns:
+            List of color names or empty list if failed
+        """
         # Extract dominant colors with clothing type awareness
         hex_colors = self.extract_dominant_colors(image, clothing_type)
         if not hex_colors:
@@ -404,8 +552,26 @@ class FashionColorExtractor:
         return unique_colors
 
 
+# Per-process extractors for the color extraction pool, one per settings
+_worker_extractors = {}
+
+
+def _extract_colors_worker(content, clothing_type, extractor_kwargs):
+    """Decode image bytes and extract color names in a worker process."""
+    key = tuple(sorted(extractor_kwargs.items()))
+    extractor = _worker_extractors.get(key)
+    if extractor is None:
+        extractor = _worker_extractors[key] = FashionColorExtractor(**extractor_kwargs)
+
+    image = extractor.decode_image(content)
+    if image is None:
+        return []
+    return extractor.extract_colors_from_image(image, clothing_type)
+
+
 def process_product_file(input_file, output_file, num_colors=13, hue_threshold=15,
-                        probability_threshold=0.05, remove_background=True, max_products=None):
+                        probability_threshold=0.05, remove_background=True, max_products=None,
+                        download_workers=16, max_workers=None, pool=None):
     """
     Process a JSON file of products and extract colors.
 
@@ -417,6 +583,11 @@ def process_product_file(input_file, output_file, num_colors=13, hue_threshold=1
         probability_threshold: Minimum probability for a color to be included
         remove_background: Whether to use background removal
         max_products: Maximum number of products to process (None for all)
+        download_workers: Number of concurrent image downloads
+        max_workers: Number of color extraction processes (None for CPU count),
+            when no pool is given
+        pool: ProcessPoolExecutor to run color extraction on, shared across
+            files; a pool of max_workers processes is created if None
     """
     print(f"\nProcessing {input_file}...")
 
@@ -433,41 +604,78 @@ def process_product_file(input_file, output_file, num_colors=13, hue_threshold=1
     else:
         print(f"Processing all {total_products} products")
 
-    # Initialize color extractor with all parameters
-    extractor = FashionColorExtractor(
+    # Color extractor settings, sent with each image to the worker processes
+    extractor_kwargs = dict(
         num_colors=num_colors,
         hue_threshold=hue_threshold,
         probability_threshold=probability_threshold,
         remove_background=remove_background
     )
 
-    # Process each product
-    processed_count = 0
-    success_count = 0
-
+    # Download images on a thread pool while a process pool runs the
+    # CPU-bound GrabCut + K-means stage on images already fetched
+    jobs = []
     for i, product in enumerate(products):
-        image_url = product.get('image_url')
-        product_name = product.get('name') or 'Unknown'
-        clothing_type = product.get('clothing_type')
-
-        if not image_url:
+        if product.get('image_url'):
+            jobs.append((i, product))
+        else:
+            product_name = product.get('name') or 'Unknown'
             print(f"[{i+1}/{len(products)}] Skipping product (no image URL): {product_name}")
-            continue
 
-        print(f"[{i+1}/{len(products)}] Processing: {product_name[:50]}... ({clothing_type})")
+    processed_count = 0
+    success_count = 0
 
-        # Extract colors with clothing type awareness
-        colors = extractor.extract_colors_from_url(image_url, clothing_type)
+    own_pool = pool is None
+    if own_pool:
+        pool = ProcessPoolExecutor(max_workers=max_workers)
 
-        if colors:
-            product['colors'] = colors
-            success_count += 1
-            print(f"  -> Found colors: {colors}")
-        else:
-            product['colors'] = []
-            print(f"  -> No colors extracted")
-
-        processed_count += 1
+    def download_and_submit(product):
+        """Fetch a product image and queue it for color extraction."""
+        content = fetch_image_bytes(product['image_url'])
+        if content is None:
+            return None
+        return pool.submit(_extract_colors_worker, content, product.get('clothing_type'), extractor_kwargs)
+
+    try:
+        with ThreadPoolExecutor(max_workers=download_workers) as downloads:
+            # Results are taken in product order, and at most two images per
+            # download thread are fetched ahead of that, so a slow image never
+            # leaves the rest of the file's images waiting in memory at once
+            remaining = iter(jobs)
+            in_flight = deque()
+
+            def submit_next():
+                job = next(remaining, None)
+                if job is not None:
+                    in_flight.append((*job, downloads.submit(download_and_submit, job[1])))
+
+            for _ in range(2 * download_workers):
+                submit_next()
+
+            # Process each product
+            while in_flight:
+                i, product, download = in_flight.popleft()
+                product_name = product.get('name') or 'Unknown'
+                clothing_type = product.get('clothing_type')
+                print(f"[{i+1}/{len(products)}] Processing: {product_name[:50]}... ({clothing_type})")
+
+                # Extract colors with clothing type awareness
+                extraction = download.result()
+                colors = extraction.result() if extraction is not None else []
+                submit_next()
+
+                if colors:
+                    product['colors'] = colors
+                    success_count += 1
+                    print(f"  -> Found colors: {colors}")
+                else:
+                    product['colors'] = []
+                    print(f"  -> No colors extracted")
+
+                processed_count += 1
+    finally:
+        if own_pool:
+            pool.shutdown()
 
     # Update data
     data['products'] = products if max_products else products
@@ -520,17 +728,20 @@ if __name__ == "__main__":
     else:
         print(f"\nFound {len(json_files)} JSON files to process\n")
 
-        for json_file in json_files:
-            output_file = output_dir_with_colors / json_file.name
-            process_product_file(
-                input_file=json_file,
-                output_file=output_file,
-                num_colors=NUM_COLORS,
-                hue_threshold=HUE_THRESHOLD,
-                probability_threshold=PROBABILITY_THRESHOLD,
-                remove_background=REMOVE_BACKGROUND,
-                max_products=MAX_PRODUCTS
-            )
+        # One pool of color extraction processes for every file
+        with ProcessPoolExecutor() as pool:
+            for json_file in json_files:
+                output_file = output_dir_with_colors / json_file.name
+                process_product_file(
+                    input_file=json_file,
+                    output_file=output_file,
+                    num_colors=NUM_COLORS,
+                    hue_threshold=HUE_THRESHOLD,
+                    probability_threshold=PROBABILITY_THRESHOLD,
+                    remove_background=REMOVE_BACKGROUND,
+                    max_products=MAX_PRODUCTS,
+                    pool=pool
+                )
 
         print(f"\n{'='*60}")
         print("All files processed successfully!")
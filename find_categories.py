@@ -1,7 +1,20 @@
 """Find actual category URLs from Fashion Bug and Cool Planet navigation."""
 
 import asyncio
-from patchright.async_api import async_playwright
+import re
+from patchright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+
+
+def _keyword_pattern(words):
+    """Compile keywords into one regex that matches any of them as a substring."""
+    return re.compile('|'.join(re.escape(word) for word in words))
+
+
+# Link-text keyword matchers, compiled once so each link is one regex scan
+WOMEN_WORDS = _keyword_pattern(['women', 'ladies', 'womens', 'womans', 'woman', 'lady'])
+WOMEN_CATEGORY_WORDS = _keyword_pattern(['top', 'blouse', 'dress', 'skirt', 'trouser', 'pant', 'casual', 'shirt'])
+MEN_WORDS = _keyword_pattern(['men', 'mens', 'gents', 'gent', 'male'])
+MEN_CATEGORY_WORDS = _keyword_pattern(['shirt', 'trouser', 'pant', 'short', 'casual', 'top'])
 
 
 async def find_categories(url, site_name):
@@ -17,30 +30,33 @@ async def find_categories(url, site_name):
 
         print(f"Loading {url}...")
         await page.goto(url, timeout=60000)
-        await asyncio.sleep(3)
+        try:
+            # Wait for the navigation menus to settle rather than a fixed sleep
+            await page.wait_for_load_state('networkidle', timeout=10000)
+        except PlaywrightTimeoutError:
+            pass
 
-        # Get all links
-        all_links = await page.query_selector_all('a')
+        # Get all links' href and text in a single round trip
+        all_links = await page.evaluate(
+            "() => Array.from(document.querySelectorAll('a'), a => [a.getAttribute('href'), a.innerText])"
+        )
 
         # Filter for collection/category links
         categories = {"Women": [], "Men": []}
 
-        for link in all_links:
-            href = await link.get_attribute('href')
-            text = await link.inner_text()
-
+        for href, text in all_links:
             if href and text:
                 href = href.strip()
                 text = text.strip().lower()
 
                 # Check for women's categories
-                if any(word in text for word in ['women', 'ladies', 'womens', 'womans', 'woman', 'lady']):
-                    if 'collection' in href or any(word in text for word in ['top', 'blouse', 'dress', 'skirt', 'trouser', 'pant', 'casual', 'shirt']):
+                if WOMEN_WORDS.search(text):
+                    if 'collection' in href or WOMEN_CATEGORY_WORDS.search(text):
                         categories["Women"].append({"text": text, "url": href})
 
                 # Check for men's categories
-                elif any(word in text for word in ['men', 'mens', 'gents', 'gent', 'male']):
-                    if 'collection' in href or any(word in text for word in ['shirt', 'trouser', 'pant', 'short', 'casual', 'top']):
+                elif MEN_WORDS.search(text):
+                    if 'collection' in href or MEN_CATEGORY_WORDS.search(text):
                         categories["Men"].append({"text": text, "url": href})
 
         # Remove duplicates
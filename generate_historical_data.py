@@ -6,20 +6,41 @@ with randomly adjusted prices (5-25% variation).
 
 import sqlite3
 import random
+import numpy as np
 from datetime import datetime, timedelta
 import json
 
+from init_database import (
+    open_database, drop_table_indexes, rebuild_indexes, create_color_history_items, split_color_history,
+)
+
 DB_PATH = "fashion_scraper.db"
 DAYS_TO_GENERATE = 30
 
 def get_existing_data():
     """Get current products with their latest prices and colors."""
-    conn = sqlite3.connect(DB_PATH)
+    conn = open_database(DB_PATH)
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
 
-    # Get all products with their current data
+    # Get all products with their current data - the latest row per product
+    # in each history table, ranked once with a window function
     cursor.execute("""
+        WITH latest_names AS (
+            SELECT product_id, name,
+                   ROW_NUMBER() OVER (PARTITION BY product_id ORDER BY id DESC) AS rn
+            FROM product_names
+        ),
+        latest_prices AS (
+            SELECT product_id, price, price_numeric,
+                   ROW_NUMBER() OVER (PARTITION BY product_id ORDER BY id DESC) AS rn
+            FROM price_history
+        ),
+        latest_colors AS (
+            SELECT product_id, colors,
+                   ROW_NUMBER() OVER (PARTITION BY product_id ORDER BY id DESC) AS rn
+            FROM color_history
+        )
         SELECT
             p.id,
             p.product_url,
@@ -31,13 +52,10 @@ def get_existing_data():
             ph.price_numeric,
             ch.colors
         FROM products p
-        LEFT JOIN product_names pn ON p.id = pn.product_id
-        LEFT JOIN price_history ph ON p.id = ph.product_id
-        LEFT JOIN color_history ch ON p.id = ch.product_id
+        JOIN latest_names pn ON pn.product_id = p.id AND pn.rn = 1
+        JOIN latest_prices ph ON ph.product_id = p.id AND ph.rn = 1
+        JOIN latest_colors ch ON ch.product_id = p.id AND ch.rn = 1
         WHERE p.is_active = 1
-          AND pn.id IN (SELECT MAX(id) FROM product_names GROUP BY product_id)
-          AND ph.id IN (SELECT MAX(id) FROM price_history GROUP BY product_id)
-          AND ch.id IN (SELECT MAX(id) FROM color_history GROUP BY product_id)
     """)
 
     products = cursor.fetchall()
@@ -45,27 +63,32 @@ def get_existing_data():
 
     return [dict(p) for p in products]
 
-def generate_price_variation(base_price, day_offset):
+def generate_price_variations(base_prices, num_days=DAYS_TO_GENERATE, rng=None):
     """
-    Generate a price variation for a given day.
+    Generate price variations for every product and day at once.
     - Earlier days have more variation
     - Random fluctuation between -25% and +25%
     - Ensure price is always positive
+
+    Returns a (num_products, num_days) array; column d is day offset d + 1.
     """
-    # Random variation between 5% and 25%
-    variation_percent = random.uniform(0.05, 0.25)
+    rng = rng or np.random.default_rng()
+    shape = (len(base_prices), num_days)
 
-    # Randomly increase or decrease
-    if random.random() > 0.5:
-        variation_percent = -variation_percent
+    # Random variation between 5% and 25%, randomly increased or decreased
+    variation_percent = rng.uniform(0.05, 0.25, shape) * rng.choice([-1, 1], shape)
 
     # Add some trend (prices generally increase over time)
-    trend = (DAYS_TO_GENERATE - day_offset) * 0.002  # Slight upward trend
+    trend = (num_days - np.arange(1, num_days + 1)) * 0.002  # Slight upward trend
 
-    new_price = base_price * (1 + variation_percent + trend)
+    base = np.asarray(base_prices, dtype=np.float64)
+    new_prices = base[:, np.newaxis] * (1 + variation_percent + trend[np.newaxis, :])
 
     # Ensure price is positive and round to 2 decimals
-    return max(100, round(new_price, 2))
+    return np.maximum(100, np.round(new_prices, 2))
+
+HISTORY_TABLES = ("price_history", "color_history")
+
 
 def create_scraping_sessions(conn):
     """Create scraping sessions for the past 30 days."""
@@ -107,8 +130,9 @@ def populate_historical_data():
     print(f"   Found {len(products)} products to replicate")
 
     # Connect to database
-    conn = sqlite3.connect(DB_PATH)
+    conn = open_database(DB_PATH)
     conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA synchronous=OFF")  # test data, can simply be regenerated
     cursor = conn.cursor()
 
     # Create scraping sessions
@@ -120,52 +144,44 @@ def populate_historical_data():
     print("\n[3/4] Generating price and color history...")
     total_records = 0
 
+    # Bulk insert without maintaining the history indexes row by row; the
+    # drop, inserts and rebuild share one transaction so a failed run
+    # rolls back to the original indexes
+    conn.execute("BEGIN")
+    # Databases initialized before color_history_items existed get it here
+    create_color_history_items(cursor)
+    index_sql = drop_table_indexes(cursor, HISTORY_TABLES)
+    last_color_history_id = cursor.execute("SELECT COALESCE(MAX(id), 0) FROM color_history").fetchone()[0]
+    prices = generate_price_variations([product['price_numeric'] for product in products], len(sessions))
+
     for day_offset, session in enumerate(sessions, 1):
-        session_date = session['date']
+        scraped_at = session['date'].strftime('%Y-%m-%d %H:%M:%S')
         session_id = session['id']
-        products_this_session = 0
 
-        for product in products:
-            # Generate price for this day
-            new_price_numeric = generate_price_variation(product['price_numeric'], day_offset)
+        # Build this session's rows, then insert each table in one executemany.
+        # Names are unchanged, so like an import of unchanged names the
+        # session adds no product_names rows.
+        price_rows = []
+        color_rows = []
+
+        for product, new_price_numeric in zip(products, prices[:, day_offset - 1].tolist()):
             new_price = f"Rs {new_price_numeric:,.2f}"
 
-            # Insert price history
-            cursor.execute("""
-                INSERT INTO price_history (product_id, price, price_numeric, scraped_at, session_id)
-                VALUES (?, ?, ?, ?, ?)
-            """, (
-                product['id'],
-                new_price,
-                new_price_numeric,
-                session_date.strftime('%Y-%m-%d %H:%M:%S'),
-                session_id
-            ))
-
-            # Insert color history (same colors)
-            cursor.execute("""
-                INSERT INTO color_history (product_id, colors, scraped_at, session_id)
-                VALUES (?, ?, ?, ?)
-            """, (
-                product['id'],
-                product['colors'],
-                session_date.strftime('%Y-%m-%d %H:%M:%S'),
-                session_id
-            ))
-
-            # Insert product name (same name)
-            cursor.execute("""
-                INSERT INTO product_names (product_id, name, scraped_at, session_id)
-                VALUES (?, ?, ?, ?)
-            """, (
-                product['id'],
-                product['name'],
-                session_date.strftime('%Y-%m-%d %H:%M:%S'),
-                session_id
-            ))
-
-            products_this_session += 1
-            total_records += 3  # price + color + name
+            price_rows.append((product['id'], new_price, new_price_numeric, scraped_at, session_id))
+            color_rows.append((product['id'], product['colors'], scraped_at, session_id))  # same colors
+
+        cursor.executemany("""
+            INSERT INTO price_history (product_id, price, price_numeric, scraped_at, session_id)
+            VALUES (?, ?, ?, ?, ?)
+        """, price_rows)
+
+        cursor.executemany("""
+            INSERT INTO color_history (product_id, colors, scraped_at, session_id)
+            VALUES (?, ?, ?, ?)
+        """, color_rows)
+
+        products_this_session = len(products)
+        total_records += 2 * products_this_session  # price + color
 
         # Update session product count
         cursor.execute("""
@@ -174,11 +190,16 @@ def populate_historical_data():
             WHERE id = ?
         """, (products_this_session, session_id))
 
-        # Commit every 5 days to show progress
+        # Show progress every 5 days (everything is committed once at the end)
         if day_offset % 5 == 0:
-            conn.commit()
-            print(f"   Day {day_offset}/{DAYS_TO_GENERATE}: {products_this_session} products x 3 records")
+            print(f"   Day {day_offset}/{DAYS_TO_GENERATE}: {products_this_session} products x 2 records")
+
+    # Split the generated colors into color_history_items in one statement
+    color_items = split_color_history(cursor, last_color_history_id)
+    print(f"   Added {color_items:,} color history items")
 
+    print(f"   Rebuilding {len(index_sql)} history indexes...")
+    rebuild_indexes(cursor, index_sql)
     conn.commit()
     print(f"\n   Total records created: {total_records:,}")
 
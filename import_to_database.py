@@ -3,17 +3,35 @@ Import scraped product data from JSON files into SQLite database.
 Handles price history, color history, and product tracking over time.
 """
 
-import sqlite3
-import json
+import os
 import re
 from pathlib import Path
 from datetime import datetime
+from functools import lru_cache
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import orjson
+
+try:
+    import ijson  # optional: streams large JSON files instead of loading them whole
+except ImportError:
+    ijson = None
+
+from init_database import (
+    open_database, drop_table_indexes, rebuild_indexes, create_color_history_items, split_color_history,
+)
 
 
 DB_PATH = Path(__file__).parent / "fashion_scraper.db"
 DATA_DIR = Path(__file__).parent / "output_with_colors"
+URL_LOOKUP_CHUNK_SIZE = 500  # stays under SQLite's bound-variable limit
+HISTORY_TABLES = ("product_names", "price_history", "color_history", "image_history", "size_history")
 
+_PRICE_NUMBER_RE = re.compile(r'(\d[\d,]*(?:\.\d+)?)')
 
+
+@lru_cache(maxsize=4096)  # scrapes repeat the same few price strings
 def extract_price_numeric(price_str):
     """
     Extract numeric value from price string.
@@ -27,21 +45,292 @@ def extract_price_numeric(price_str):
     if not price_str:
         return None
 
-    # Remove "Rs", "LKR", commas, and extra spaces
-    cleaned = re.sub(r'[Rr]s|LKR|,', '', price_str).strip()
-
-    # Extract first numeric value
-    match = re.search(r'\d+\.?\d*', cleaned)
+    # First number, allowing thousands separators (currency text is skipped)
+    match = _PRICE_NUMBER_RE.search(price_str)
     if match:
-        try:
-            return float(match.group(0))
-        except ValueError:
-            return None
+        return float(match.group(1).replace(',', ''))
 
     return None
 
 
-def import_json_file(file_path, session_id, cursor, scraped_at):
+def iter_json_products(f):
+    """
+    Yield the products of a scraped JSON file one at a time.
+
+    Streams with ijson when it is installed, so only the current product is
+    held in memory; otherwise parses the whole file at once with orjson.
+
+    Args:
+        f: JSON file opened in binary mode
+
+    Returns:
+        Iterator of product dicts
+    """
+    if ijson is not None:
+        return ijson.items(f, 'products.item', use_float=True)
+    return iter(orjson.loads(f.read()).get('products', []))
+
+
+def load_product_ids(cursor):
+    """
+    Load every existing product as a dict mapping product URL to product ID.
+
+    Args:
+        cursor: Database cursor
+
+    Returns:
+        Dict mapping product URL to product ID
+    """
+    cursor.execute("SELECT product_url, id FROM products")
+    return dict(cursor.fetchall())
+
+
+def with_product_ids(rows, product_ids):
+    """
+    Replace the leading product URL of each history row with its product ID.
+
+    Args:
+        rows: Iterable of (product_url, *values) tuples
+        product_ids: Dict mapping product URL to product ID
+
+    Returns:
+        Iterator of (product_id, *values) tuples
+    """
+    return ((product_ids[product_url], *values) for product_url, *values in rows)
+
+
+def load_latest_values(cursor):
+    """
+    Load the latest recorded name and sizes of every product.
+
+    Args:
+        cursor: Database cursor
+
+    Returns:
+        Dict with 'names' and 'sizes' dicts mapping product ID to the latest value
+    """
+    # json() minifies sizes recorded with json.dumps' spacing to match the
+    # compact orjson text new rows are compared as
+    latest_columns = (
+        ('names', 'product_names', 'name'),
+        ('sizes', 'size_history', 'CASE WHEN json_valid(sizes) THEN json(sizes) ELSE sizes END'),
+    )
+    latest_values = {}
+    for key, table, column in latest_columns:
+        cursor.execute(f"""
+            SELECT product_id, {column} FROM {table}
+            WHERE id IN (SELECT MAX(id) FROM {table} GROUP BY product_id)
+        """)
+        latest_values[key] = dict(cursor.fetchall())
+    return latest_values
+
+
+def changed_rows(rows, product_ids, latest):
+    """
+    Keep only history rows whose value differs from the product's latest one.
+
+    Args:
+        rows: Iterable of (product_url, value, *rest) tuples
+        product_ids: Dict mapping product URL to product ID
+        latest: Dict mapping product ID to its latest value, updated in place
+
+    Returns:
+        Iterator of (product_id, value, *rest) tuples
+    """
+    for product_url, value, *rest in rows:
+        product_id = product_ids[product_url]
+        if latest.get(product_id) != value:
+            latest[product_id] = value
+            yield (product_id, value, *rest)
+
+
+def fetch_product_ids(cursor, product_urls):
+    """
+    Look up existing product IDs by URL.
+
+    Args:
+        cursor: Database cursor
+        product_urls: Iterable of product URLs
+
+    Returns:
+        Dict mapping product URL to product ID for URLs already in the database
+    """
+    product_urls = list(product_urls)
+    product_ids = {}
+
+    for i in range(0, len(product_urls), URL_LOOKUP_CHUNK_SIZE):
+        chunk = product_urls[i:i + URL_LOOKUP_CHUNK_SIZE]
+        placeholders = ", ".join("?" for _ in chunk)
+        cursor.execute(f"SELECT product_url, id FROM products WHERE product_url IN ({placeholders})", chunk)
+        product_ids.update(cursor.fetchall())
+
+    return product_ids
+
+
+def parse_json_file(file_path, session_id, scraped_at):
+    """
+    Read a JSON file into the rows to write, without touching the database.
+
+    Products are kept as (product_url, site, category, gender, clothing_type,
+    brand) tuples; history rows are keyed by product URL until IDs exist.
+
+    Args:
+        file_path: Path to JSON file
+        session_id: Scraping session ID
+        scraped_at: Timestamp for this scrape, as ISO-8601 text
+
+    Returns:
+        Dict with total_count, products and the names/prices/colors/images/sizes rows
+    """
+    parsed = {
+        'total_count': 0,
+        'products': [],
+        'names': [],
+        'prices': [],
+        'colors': [],
+        'images': [],
+        'sizes': [],
+    }
+
+    # Category from filename for products without one
+    # e.g., "cool_planet_men.json" -> category from filename
+    parts = file_path.stem.split('_')  # e.g., "cool_planet_men"
+    default_category = ''
+    if len(parts) >= 2:
+        default_category = ' '.join(parts[2:]) if len(parts) > 2 else parts[-1]  # Get category part
+
+    with open(file_path, 'rb') as f:
+        for product in iter_json_products(f):
+            parsed['total_count'] += 1
+
+            # Skip products without URL
+            if not product.get('product_url'):
+                continue
+
+            product_url = product['product_url']
+            site = product.get('site_name', '')  # JSON uses 'site_name' not 'site'
+            category = product.get('category') or default_category
+            gender = product.get('main_category', '')  # 'Men' or 'Women'
+            clothing_type = product.get('clothing_type', '')
+            brand = product.get('brand', '')
+
+            parsed['products'].append((product_url, site, category, gender, clothing_type, brand))
+
+            name = product.get('name')
+            if name:
+                parsed['names'].append((product_url, name, scraped_at, session_id))
+
+            price = product.get('price')
+            if price:
+                parsed['prices'].append((product_url, price, extract_price_numeric(price), scraped_at, session_id))
+
+            colors = product.get('colors', [])
+            if colors:
+                parsed['colors'].append((product_url, orjson.dumps(colors).decode(), len(colors), scraped_at, session_id))
+
+            image_url = product.get('image_url')
+            if image_url:
+                parsed['images'].append((product_url, image_url, scraped_at, session_id))
+
+            sizes = product.get('sizes', [])
+            if sizes:
+                parsed['sizes'].append((product_url, orjson.dumps(sizes).decode(), scraped_at, session_id))
+
+    return parsed
+
+
+def write_parsed_file(parsed, cursor, scraped_at, product_ids, latest_values):
+    """
+    Write the rows of one parsed JSON file to the database.
+
+    Names and sizes are change logs: a row is only added when the value
+    differs from the product's latest one. Prices, colors and images get a
+    row every scrape, since the API's daily trends and date-range filters
+    read them per session.
+
+    Args:
+        parsed: Result of parse_json_file
+        cursor: Database cursor
+        scraped_at: Timestamp for this scrape, as ISO-8601 text
+        product_ids: Dict of existing product URL -> ID, updated in place with new products
+        latest_values: Result of load_latest_values, updated in place
+
+    Returns:
+        Tuple of (new products, updated products, dict of history rows added per table)
+    """
+    # Classify products as updates or new inserts
+    updates = []
+    inserts = []
+    new_urls = set()
+
+    for product_url, site, category, gender, clothing_type, brand in parsed['products']:
+        if product_url in product_ids or product_url in new_urls:
+            # Product exists (or appeared earlier in this file) - update it
+            updates.append((scraped_at, category, gender, clothing_type, brand, product_url))
+        else:
+            # New product - insert it
+            inserts.append((product_url, site, category, gender, clothing_type, brand, scraped_at, scraped_at))
+            new_urls.add(product_url)
+
+    # New products are upserted so a URL missing from a stale product_ids map
+    # updates the existing row instead of failing the import. Known products
+    # stay a plain UPDATE: a conflicting upsert still consumes an AUTOINCREMENT
+    # id, which would inflate the products sequence on every re-import.
+    cursor.executemany("""
+        INSERT INTO products (product_url, site, category, gender, clothing_type, brand, first_seen, last_seen, is_active)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1)
+        ON CONFLICT(product_url) DO UPDATE SET
+            last_seen = excluded.last_seen,
+            is_active = 1,
+            category = excluded.category,
+            gender = excluded.gender,
+            clothing_type = excluded.clothing_type,
+            brand = excluded.brand
+    """, inserts)
+    cursor.executemany("""
+        UPDATE products
+        SET last_seen = ?, is_active = 1, category = ?, gender = ?, clothing_type = ?, brand = ?
+        WHERE product_url = ?
+    """, updates)
+
+    product_ids.update(fetch_product_ids(cursor, new_urls))
+
+    # Insert each history table at once, swapping URLs for product IDs
+    cursor.executemany("""
+        INSERT INTO product_names (product_id, name, scraped_at, session_id)
+        VALUES (?, ?, ?, ?)
+    """, changed_rows(parsed['names'], product_ids, latest_values['names']))
+    history_counts = {'product_names': cursor.rowcount}
+    cursor.executemany("""
+        INSERT INTO price_history (product_id, price, price_numeric, currency, scraped_at, session_id)
+        VALUES (?, ?, ?, 'Rs', ?, ?)
+    """, with_product_ids(parsed['prices'], product_ids))
+    history_counts['price_history'] = cursor.rowcount
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM color_history")
+    last_color_history_id = cursor.fetchone()[0]
+    cursor.executemany("""
+        INSERT INTO color_history (product_id, colors, colors_count, scraped_at, session_id)
+        VALUES (?, ?, ?, ?, ?)
+    """, with_product_ids(parsed['colors'], product_ids))
+    history_counts['color_history'] = cursor.rowcount
+    # Split the new rows' colors into color_history_items in one statement
+    split_color_history(cursor, last_color_history_id)
+    cursor.executemany("""
+        INSERT INTO image_history (product_id, image_url, scraped_at, session_id)
+        VALUES (?, ?, ?, ?)
+    """, with_product_ids(parsed['images'], product_ids))
+    history_counts['image_history'] = cursor.rowcount
+    cursor.executemany("""
+        INSERT INTO size_history (product_id, sizes, scraped_at, session_id)
+        VALUES (?, ?, ?, ?)
+    """, changed_rows(parsed['sizes'], product_ids, latest_values['sizes']))
+    history_counts['size_history'] = cursor.rowcount
+
+    return len(inserts), len(updates), history_counts
+
+
+def import_json_file(file_path, session_id, cursor, scraped_at, product_ids=None, parsed=None, latest_values=None,
+                     history_counts=None):
     """
     Import products from a single JSON file.
 
@@ -49,111 +338,40 @@ def import_json_file(file_path, session_id, cursor, scraped_at):
         file_path: Path to JSON file
         session_id: Scraping session ID
         cursor: Database cursor
-        scraped_at: Timestamp for this scrape
+        scraped_at: Timestamp for this scrape, as ISO-8601 text
+        product_ids: Optional dict of existing product URL -> ID, updated in
+            place with new products; looked up from the database if omitted
+        parsed: Optional result of parse_json_file for this file, if it was
+            already read
+        latest_values: Optional result of load_latest_values, updated in
+            place; loaded from the database if omitted
+        history_counts: Optional Counter of history rows added per table,
+            updated in place
 
     Returns:
         Number of products imported
     """
     print(f"\n[+] Importing: {file_path.name}")
 
-    with open(file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    products = data.get('products', [])
-    print(f"    Found {len(products)} products")
-
-    imported_count = 0
-    updated_count = 0
-
-    for product in products:
-        # Skip products without URL
-        if not product.get('product_url'):
-            continue
-
-        product_url = product['product_url']
-        site = product.get('site_name', '')  # JSON uses 'site_name' not 'site'
-        category = product.get('category', '')  # Will be extracted from filename if empty
-        gender = product.get('main_category', '')  # 'Men' or 'Women'
-        clothing_type = product.get('clothing_type', '')
-        brand = product.get('brand', '')
-
-        # Extract category from filename if not in product data
-        # e.g., "cool_planet_men.json" -> category from filename
-        if not category:
-            filename = file_path.stem  # e.g., "cool_planet_men"
-            parts = filename.split('_')
-            if len(parts) >= 2:
-                category = ' '.join(parts[2:]) if len(parts) > 2 else parts[-1]  # Get category part
-
-        # Check if product exists
-        cursor.execute("SELECT id, first_seen FROM products WHERE product_url = ?", (product_url,))
-        result = cursor.fetchone()
-
-        if result:
-            # Product exists - update it
-            product_id, first_seen = result
-            cursor.execute("""
-                UPDATE products
-                SET last_seen = ?, is_active = 1, category = ?, gender = ?, clothing_type = ?, brand = ?
-                WHERE id = ?
-            """, (scraped_at, category, gender, clothing_type, brand, product_id))
-            updated_count += 1
-        else:
-            # New product - insert it
-            cursor.execute("""
-                INSERT INTO products (product_url, site, category, gender, clothing_type, brand, first_seen, last_seen, is_active)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1)
-            """, (product_url, site, category, gender, clothing_type, brand, scraped_at, scraped_at))
-            product_id = cursor.lastrowid
-            imported_count += 1
-
-        # Insert product name
-        name = product.get('name')
-        if name:
-            cursor.execute("""
-                INSERT INTO product_names (product_id, name, scraped_at, session_id)
-                VALUES (?, ?, ?, ?)
-            """, (product_id, name, scraped_at, session_id))
-
-        # Insert price
-        price = product.get('price')
-        if price:
-            price_numeric = extract_price_numeric(price)
-            cursor.execute("""
-                INSERT INTO price_history (product_id, price, price_numeric, currency, scraped_at, session_id)
-                VALUES (?, ?, ?, 'Rs', ?, ?)
-            """, (product_id, price, price_numeric, scraped_at, session_id))
-
-        # Insert colors
-        colors = product.get('colors', [])
-        if colors:
-            colors_json = json.dumps(colors)
-            cursor.execute("""
-                INSERT INTO color_history (product_id, colors, colors_count, scraped_at, session_id)
-                VALUES (?, ?, ?, ?, ?)
-            """, (product_id, colors_json, len(colors), scraped_at, session_id))
-
-        # Insert image URL
-        image_url = product.get('image_url')
-        if image_url:
-            cursor.execute("""
-                INSERT INTO image_history (product_id, image_url, scraped_at, session_id)
-                VALUES (?, ?, ?, ?)
-            """, (product_id, image_url, scraped_at, session_id))
-
-        # Insert sizes
-        sizes = product.get('sizes', [])
-        if sizes:
-            sizes_json = json.dumps(sizes)
-            cursor.execute("""
-                INSERT INTO size_history (product_id, sizes, scraped_at, session_id)
-                VALUES (?, ?, ?, ?)
-            """, (product_id, sizes_json, scraped_at, session_id))
+    if parsed is None:
+        parsed = parse_json_file(file_path, session_id, scraped_at)
+    if product_ids is None:
+        product_ids = load_product_ids(cursor)
+    if latest_values is None:
+        latest_values = load_latest_values(cursor)
+
+    print(f"    Found {parsed['total_count']} products")
+
+    imported_count, updated_count, file_history_counts = write_parsed_file(
+        parsed, cursor, scraped_at, product_ids, latest_values
+    )
+    if history_counts is not None:
+        history_counts.update(file_history_counts)
 
     print(f"    New products: {imported_count}")
     print(f"    Updated products: {updated_count}")
 
-    return len(products)
+    return parsed['total_count']
 
 
 def import_all_data(data_dir=DATA_DIR, db_path=DB_PATH, notes=None):
@@ -195,59 +413,127 @@ def import_all_data(data_dir=DATA_DIR, db_path=DB_PATH, notes=None):
     for f in json_files:
         print(f"  - {f.name}")
 
-    # Create database connection
-    conn = sqlite3.connect(db_path)
+    # Create database connection; transaction boundaries are managed explicitly
+    conn = open_database(db_path)
+    conn.isolation_level = None
     cursor = conn.cursor()
 
-    # Create new scraping session
-    started_at = datetime.now()
-    cursor.execute("""
-        INSERT INTO scraping_sessions (started_at, notes)
-        VALUES (?, ?)
-    """, (started_at, notes))
-    session_id = cursor.lastrowid
-
-    print(f"\nCreated scraping session #{session_id}")
-    print(f"Started at: {started_at}")
-
-    # Import each file
-    total_products = 0
-    for json_file in json_files:
-        count = import_json_file(json_file, session_id, cursor, started_at)
-        total_products += count
-
-    # Update session
-    completed_at = datetime.now()
-    cursor.execute("""
-        UPDATE scraping_sessions
-        SET completed_at = ?, total_products = ?
-        WHERE id = ?
-    """, (completed_at, total_products, session_id))
-
-    # Commit all changes
-    conn.commit()
+    # Foreign keys are off by default; if a caller enabled them, skip the
+    # per-row checks during the bulk load and verify once afterwards. The
+    # pragma has no effect inside a transaction, so it is set before BEGIN.
+    foreign_keys = cursor.execute("PRAGMA foreign_keys").fetchone()[0]
+    if foreign_keys:
+        cursor.execute("PRAGMA foreign_keys=OFF")
+
+    # The whole session, including the index drop and rebuild, is written in
+    # one transaction and rolled back on failure
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        # Create new scraping session
+        # Timestamps are bound as ISO-8601 text, formatted once per session
+        # rather than by sqlite3's (deprecated) datetime adapter on every row
+        started_at = datetime.now()
+        scraped_at = started_at.isoformat(sep=' ')
+        cursor.execute("""
+            INSERT INTO scraping_sessions (started_at, notes)
+            VALUES (?, ?)
+        """, (scraped_at, notes))
+        session_id = cursor.lastrowid
+
+        print(f"\nCreated scraping session #{session_id}")
+        print(f"Started at: {started_at}")
+
+        # Databases initialized before color_history_items existed get it
+        # (and its backfill) here, since every file writes to it
+        create_color_history_items(cursor)
+
+        # Existing products and their latest names/sizes are loaded once, while
+        # the history indexes still exist, so files need no lookup queries
+        product_ids = load_product_ids(cursor)
+        latest_values = load_latest_values(cursor)
+
+        # Import each file without maintaining any history index row by row
+        index_sql = drop_table_indexes(cursor, HISTORY_TABLES)
+        history_counts = Counter()
+        total_products = 0
+
+        # Files are read and parsed on worker threads while this thread, the
+        # only one using the connection, writes them in order. At most
+        # max_workers files are parsed ahead of the writer, so a slow write
+        # never leaves every parsed file waiting in memory at once.
+        max_workers = min(len(json_files), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            remaining = iter(json_files)
+            in_flight = deque()
+
+            def submit_next():
+                json_file = next(remaining, None)
+                if json_file is not None:
+                    in_flight.append((json_file, pool.submit(parse_json_file, json_file, session_id, scraped_at)))
+
+            for _ in range(max_workers):
+                submit_next()
+            while in_flight:
+                json_file, future = in_flight.popleft()
+                parsed = future.result()
+                submit_next()
+                count = import_json_file(json_file, session_id, cursor, scraped_at, product_ids, parsed, latest_values,
+                                         history_counts)
+                del parsed  # release it before waiting on the next file
+                total_products += count
+
+        print(f"\nRebuilding {len(index_sql)} history indexes...")
+        rebuild_indexes(cursor, index_sql)
+
+        # Update session
+        completed_at = datetime.now()
+        cursor.execute("""
+            UPDATE scraping_sessions
+            SET completed_at = ?, total_products = ?
+            WHERE id = ?
+        """, (completed_at.isoformat(sep=' '), total_products, session_id))
+
+        cursor.execute("COMMIT")
+    except Exception:
+        cursor.execute("ROLLBACK")
+        conn.close()
+        raise
+
+    if foreign_keys:
+        violations = cursor.execute("PRAGMA foreign_key_check").fetchall()
+        if violations:
+            print(f"\nWARNING: {len(violations)} foreign key violations after import")
+        cursor.execute("PRAGMA foreign_keys=ON")
+
+    # Refresh planner statistics for tables the import changed significantly
+    cursor.execute("PRAGMA optimize")
 
     # Display summary
     print("\n" + "=" * 60)
     print("Import Summary")
     print("=" * 60)
 
-    cursor.execute("SELECT COUNT(*) FROM products")
-    total_products_db = cursor.fetchone()[0]
-    print(f"Total products in database: {total_products_db}")
+    # product_ids holds every product after the import, and history rows are
+    # never deleted, so totals come from it and each table's highest id
+    # instead of COUNT(*) scans
+    print(f"Total products in database: {len(product_ids)}")
 
     cursor.execute("SELECT COUNT(*) FROM products WHERE is_active = 1")
     active_products = cursor.fetchone()[0]
     print(f"Active products: {active_products}")
 
-    cursor.execute("SELECT COUNT(*) FROM price_history")
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM price_history")
     total_prices = cursor.fetchone()[0]
     print(f"Total price records: {total_prices}")
 
-    cursor.execute("SELECT COUNT(*) FROM color_history")
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM color_history")
     total_colors = cursor.fetchone()[0]
     print(f"Total color records: {total_colors}")
 
+    print("Records added this session: " + ", ".join(
+        f"{history_counts[table]} {table}" for table in HISTORY_TABLES
+    ))
+
     print(f"\nSession #{session_id} completed at: {completed_at}")
     duration = (completed_at - started_at).total_seconds()
     print(f"Import duration: {duration:.2f} seconds")
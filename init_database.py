@@ -10,6 +10,196 @@ from datetime import datetime
 
 DB_PATH = Path(__file__).parent / "fashion_scraper.db"
 
+# WAL persists in the database file; the rest are set on every connection
+CONNECTION_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA busy_timeout=5000",
+]
+
+
+# Normalized site name ('fashionbug', 'coolplanet', ...) matching the API's
+# map_site_name(); the one definition of the products.site_key column
+SITE_KEY_EXPR = """
+    CASE
+        WHEN LOWER(site) LIKE '%fashion%' OR LOWER(site) LIKE '%bug%' THEN 'fashionbug'
+        WHEN LOWER(site) LIKE '%cool%' OR LOWER(site) LIKE '%planet%' THEN 'coolplanet'
+        ELSE REPLACE(LOWER(site), ' ', '')
+    END
+"""
+
+# Color keyword -> category buckets (same as frontend), seeded into the
+# color_categories table the API buckets color names with. Earlier keywords
+# take priority when a color name matches several.
+COLOR_CATEGORY_KEYWORDS = {}
+for _category, _keywords in [
+    ("Black", ["black", "ebony", "jet", "onyx", "coal", "raisin", "licorice"]),
+    ("White", ["white", "ivory", "cream", "beige", "eggshell", "ghost"]),
+    ("Gray", ["gray", "grey", "silver", "ash", "slate", "charcoal", "grullo", "taupe"]),
+    ("Red", ["red", "crimson", "scarlet", "ruby", "burgundy", "maroon", "cardinal", "brick"]),
+    ("Blue", ["blue", "navy", "azure", "cobalt", "sapphire", "indigo", "cerulean", "prussian", "yinmn"]),
+    ("Green", ["green", "olive", "emerald", "jade", "lime", "forest", "mint", "sage"]),
+    ("Yellow", ["yellow", "gold", "amber", "lemon", "canary", "mustard", "saffron"]),
+    ("Orange", ["orange", "coral", "peach", "tangerine", "apricot", "rust"]),
+    ("Purple", ["purple", "violet", "lavender", "plum", "mauve", "lilac", "magenta", "orchid"]),
+    ("Pink", ["pink", "rose", "salmon", "fuchsia", "blush"]),
+    ("Brown", ["brown", "tan", "khaki", "chocolate", "coffee", "mocha", "umber", "liver", "sepia"]),
+]:
+    for _keyword in _keywords:
+        COLOR_CATEGORY_KEYWORDS.setdefault(_keyword, _category)
+
+
+
+def open_database(db_path=DB_PATH):
+    """
+    Open a database connection with the write-tuned pragmas applied.
+
+    Args:
+        db_path: Path to SQLite database file
+
+    Returns:
+        sqlite3.Connection
+    """
+    conn = sqlite3.connect(db_path)
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def drop_table_indexes(cursor, tables):
+    """
+    Drop every secondary index on the given tables ahead of a bulk load.
+
+    Primary keys and UNIQUE constraints are kept, and so are indexes on
+    other tables (e.g. products.product_url, which imports look up by).
+
+    Args:
+        cursor: Cursor on the database connection
+        tables: Names of the tables being bulk loaded
+
+    Returns:
+        List of CREATE INDEX statements for rebuild_indexes
+    """
+    placeholders = ", ".join("?" for _ in tables)
+    indexes = cursor.execute(f"""
+        SELECT name, sql FROM sqlite_master
+        WHERE type = 'index' AND sql IS NOT NULL AND tbl_name IN ({placeholders})
+    """, tuple(tables)).fetchall()
+
+    for name, _ in indexes:
+        cursor.execute(f'DROP INDEX IF EXISTS "{name}"')
+    return [sql for _, sql in indexes]
+
+
+def rebuild_indexes(cursor, index_sql):
+    """
+    Recreate the indexes dropped by drop_table_indexes.
+
+    Args:
+        cursor: Cursor on the database connection
+        index_sql: Statements returned by drop_table_indexes
+    """
+    for sql in index_sql:
+        cursor.execute(sql)
+
+
+def add_site_key_column(cursor):
+    """
+    Add products.site_key to a table created before the column existed,
+    and create its index.
+
+    SQLite can only add a VIRTUAL generated column to an existing table;
+    new tables get it STORED from init_database.
+
+    Args:
+        cursor: Cursor on the database connection
+    """
+    columns = {row[1] for row in cursor.execute("PRAGMA table_xinfo(products)")}
+    if "site_key" not in columns:
+        cursor.execute(f"ALTER TABLE products ADD COLUMN site_key TEXT GENERATED ALWAYS AS ({SITE_KEY_EXPR}) VIRTUAL")
+    cursor.execute("DROP INDEX IF EXISTS ix_products_site_key")  # the API's earlier copy of the index below
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_site_key ON products(site_key, is_active)")
+
+
+def create_color_history_items(cursor):
+    """
+    Create the color_history_items table and fill it for existing history.
+
+    One row per color of each color_history entry, so colors can be
+    filtered and aggregated without parsing the JSON column.
+
+    Args:
+        cursor: Cursor on the database connection
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS color_history_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            color_history_id INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            color TEXT NOT NULL,
+            FOREIGN KEY (color_history_id) REFERENCES color_history(id) ON DELETE CASCADE
+        )
+    """)
+    cursor.execute("DROP INDEX IF EXISTS idx_color_history_items_history")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_color_history_items_history_position ON color_history_items(color_history_id, position, color)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_color_history_items_color ON color_history_items(color)")
+
+    # Backfill items for color history recorded before the table existed
+    split_color_history(cursor)
+
+
+def split_color_history(cursor, after_id=0):
+    """
+    Add color_history_items rows for color_history entries that have none.
+
+    Every writer of color_history calls this after inserting, in one
+    INSERT ... SELECT over json_each rather than a second insert per color.
+
+    Args:
+        cursor: Cursor on the database connection
+        after_id: Only split color_history rows with a higher id
+
+    Returns:
+        Number of items added
+    """
+    cursor.execute("""
+        INSERT INTO color_history_items (color_history_id, position, color)
+        SELECT ch.id, je.key, je.value
+        FROM color_history ch
+        JOIN json_each(CASE WHEN json_valid(ch.colors) THEN ch.colors ELSE '[]' END) je
+        WHERE ch.id > ?
+          AND je.value IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM color_history_items chi WHERE chi.color_history_id = ch.id)
+        ORDER BY ch.id, je.key
+    """, (after_id,))
+    return cursor.rowcount
+
+
+def create_color_categories(cursor):
+    """
+    Create the color_categories keyword lookup and seed it from
+    COLOR_CATEGORY_KEYWORDS.
+
+    Args:
+        cursor: Cursor on the database connection
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS color_categories (
+            keyword TEXT PRIMARY KEY,
+            category TEXT NOT NULL,
+            priority INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("DELETE FROM color_categories")
+    cursor.executemany(
+        "INSERT INTO color_categories (keyword, category, priority) VALUES (?, ?, ?)",
+        [(keyword, category, priority)
+         for priority, (keyword, category) in enumerate(COLOR_CATEGORY_KEYWORDS.items())]
+    )
+
 
 def init_database(db_path=DB_PATH):
     """
@@ -24,7 +214,7 @@ def init_database(db_path=DB_PATH):
     print(f"Database path: {db_path}")
 
     # Create connection
-    conn = sqlite3.connect(db_path)
+    conn = open_database(db_path)
     cursor = conn.cursor()
 
     # Scraping Sessions
@@ -41,7 +231,7 @@ def init_database(db_path=DB_PATH):
 
     # Products
     print("[+] Creating products table...")
-    cursor.execute("""
+    cursor.execute(f"""
         CREATE TABLE IF NOT EXISTS products (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             product_url TEXT NOT NULL UNIQUE,
@@ -53,15 +243,26 @@ def init_database(db_path=DB_PATH):
             first_seen TIMESTAMP NOT NULL,
             last_seen TIMESTAMP NOT NULL,
             is_active BOOLEAN DEFAULT 1,
+            site_key TEXT GENERATED ALWAYS AS ({SITE_KEY_EXPR}) STORED,
             CONSTRAINT unique_product_url UNIQUE(product_url)
         )
     """)
 
+    # Databases created before site_key existed
+    add_site_key_column(cursor)
+
     # Indexes for products
     print("[+] Creating indexes on products...")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_site_category ON products(site, category)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_clothing_type ON products(clothing_type)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_is_active ON products(is_active)")
+    # The API's filter indexes (active/site/gender/type filters, case-insensitive gender)
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_products_active_site_gender ON products(is_active, site, gender, clothing_type)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_products_gender_lower ON products(LOWER(gender))")
+
+    # History tables - the (product_id, scraped_at DESC) indexes also carry
+    # the payload columns, so "latest/history per product" reads are
+    # index-only; they replace the earlier non-covering versions
 
     # Product Names
     print("[+] Creating product_names table...")
@@ -76,7 +277,10 @@ def init_database(db_path=DB_PATH):
             FOREIGN KEY (session_id) REFERENCES scraping_sessions(id)
         )
     """)
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_product_names_product_scraped ON product_names(product_id, scraped_at DESC)")
+    cursor.execute("DROP INDEX IF EXISTS idx_product_names_product_scraped")
+    cursor.execute("DROP INDEX IF EXISTS ix_pn_pid_scraped")  # the API's earlier non-covering index
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_product_names_product_scraped_covering ON product_names(product_id, scraped_at DESC, name)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_product_names_product_id ON product_names(product_id, id DESC)")
 
     # Price History
     print("[+] Creating price_history table...")
@@ -93,8 +297,12 @@ def init_database(db_path=DB_PATH):
             FOREIGN KEY (session_id) REFERENCES scraping_sessions(id)
         )
     """)
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_price_history_product_scraped ON price_history(product_id, scraped_at DESC)")
+    cursor.execute("DROP INDEX IF EXISTS idx_price_history_product_scraped")
+    cursor.execute("DROP INDEX IF EXISTS ix_ph_pid_scraped")  # the API's earlier non-covering index
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_price_history_product_scraped_covering ON price_history(product_id, scraped_at DESC, price, price_numeric)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_price_history_product_id ON price_history(product_id, id DESC)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_price_history_session ON price_history(session_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_ph_scraped ON price_history(scraped_at)")  # the API's date-range scans
 
     # Color History
     print("[+] Creating color_history table...")
@@ -110,7 +318,14 @@ def init_database(db_path=DB_PATH):
             FOREIGN KEY (session_id) REFERENCES scraping_sessions(id)
         )
     """)
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_color_history_product_scraped ON color_history(product_id, scraped_at DESC)")
+    cursor.execute("DROP INDEX IF EXISTS idx_color_history_product_scraped")
+    cursor.execute("DROP INDEX IF EXISTS ix_ch_pid_scraped")  # the API's earlier non-covering index
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_color_history_product_scraped_covering ON color_history(product_id, scraped_at DESC, colors)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_color_history_product_id ON color_history(product_id, id DESC)")
+
+    # Color History Items - one row per color of each color_history entry
+    print("[+] Creating color_history_items table...")
+    create_color_history_items(cursor)
 
     # Image History
     print("[+] Creating image_history table...")
@@ -125,7 +340,10 @@ def init_database(db_path=DB_PATH):
             FOREIGN KEY (session_id) REFERENCES scraping_sessions(id)
         )
     """)
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_image_history_product_scraped ON image_history(product_id, scraped_at DESC)")
+    cursor.execute("DROP INDEX IF EXISTS idx_image_history_product_scraped")
+    cursor.execute("DROP INDEX IF EXISTS ix_ih_pid_scraped")  # the API's earlier non-covering index
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_image_history_product_scraped_covering ON image_history(product_id, scraped_at DESC, image_url)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_image_history_product_id ON image_history(product_id, id DESC)")
 
     # Size History
     print("[+] Creating size_history table...")
@@ -140,12 +358,16 @@ def init_database(db_path=DB_PATH):
             FOREIGN KEY (session_id) REFERENCES scraping_sessions(id)
         )
     """)
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_size_history_product_scraped ON size_history(product_id, scraped_at DESC)")
+    cursor.execute("DROP INDEX IF EXISTS idx_size_history_product_scraped")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_size_history_product_scraped_covering ON size_history(product_id, scraped_at DESC, sizes)")
 
-    # Views
+    # Views - each history table is joined on the id of its latest row per
+    # product, so price and price_numeric share one index seek. Views are
+    # recreated so existing databases pick up the current definition.
     print("[+] Creating v_latest_products view...")
+    cursor.execute("DROP VIEW IF EXISTS v_latest_products")
     cursor.execute("""
-        CREATE VIEW IF NOT EXISTS v_latest_products AS
+        CREATE VIEW v_latest_products AS
         SELECT
             p.id,
             p.product_url,
@@ -154,22 +376,28 @@ def init_database(db_path=DB_PATH):
             p.gender,
             p.clothing_type,
             p.brand,
-            (SELECT name FROM product_names WHERE product_id = p.id ORDER BY scraped_at DESC LIMIT 1) as current_name,
-            (SELECT price FROM price_history WHERE product_id = p.id ORDER BY scraped_at DESC LIMIT 1) as current_price,
-            (SELECT price_numeric FROM price_history WHERE product_id = p.id ORDER BY scraped_at DESC LIMIT 1) as current_price_numeric,
-            (SELECT colors FROM color_history WHERE product_id = p.id ORDER BY scraped_at DESC LIMIT 1) as current_colors,
-            (SELECT image_url FROM image_history WHERE product_id = p.id ORDER BY scraped_at DESC LIMIT 1) as current_image_url,
-            (SELECT sizes FROM size_history WHERE product_id = p.id ORDER BY scraped_at DESC LIMIT 1) as current_sizes,
+            pn.name as current_name,
+            ph.price as current_price,
+            ph.price_numeric as current_price_numeric,
+            ch.colors as current_colors,
+            ih.image_url as current_image_url,
+            sh.sizes as current_sizes,
             p.first_seen,
             p.last_seen,
             p.is_active
         FROM products p
+        LEFT JOIN product_names pn ON pn.id = (SELECT id FROM product_names WHERE product_id = p.id ORDER BY scraped_at DESC LIMIT 1)
+        LEFT JOIN price_history ph ON ph.id = (SELECT id FROM price_history WHERE product_id = p.id ORDER BY scraped_at DESC LIMIT 1)
+        LEFT JOIN color_history ch ON ch.id = (SELECT id FROM color_history WHERE product_id = p.id ORDER BY scraped_at DESC LIMIT 1)
+        LEFT JOIN image_history ih ON ih.id = (SELECT id FROM image_history WHERE product_id = p.id ORDER BY scraped_at DESC LIMIT 1)
+        LEFT JOIN size_history sh ON sh.id = (SELECT id FROM size_history WHERE product_id = p.id ORDER BY scraped_at DESC LIMIT 1)
         WHERE p.is_active = 1
     """)
 
     print("[+] Creating v_price_changes view...")
+    cursor.execute("DROP VIEW IF EXISTS v_price_changes")
     cursor.execute("""
-        CREATE VIEW IF NOT EXISTS v_price_changes AS
+        CREATE VIEW v_price_changes AS
         SELECT
             p.id as product_id,
             p.product_url,
@@ -185,13 +413,18 @@ def init_database(db_path=DB_PATH):
             (ph1.price_numeric - ph2.price_numeric) as price_difference,
             ROUND(((ph1.price_numeric - ph2.price_numeric) / ph2.price_numeric * 100), 2) as price_change_percent
         FROM products p
-        JOIN price_history ph1 ON p.id = ph1.product_id
-        JOIN price_history ph2 ON p.id = ph2.product_id
-        WHERE ph1.id = (SELECT id FROM price_history WHERE product_id = p.id ORDER BY scraped_at DESC LIMIT 1)
-          AND ph2.id = (SELECT id FROM price_history WHERE product_id = p.id ORDER BY scraped_at DESC LIMIT 1 OFFSET 1)
-          AND ph1.price_numeric != ph2.price_numeric
+        JOIN price_history ph1 ON ph1.id = (SELECT id FROM price_history WHERE product_id = p.id ORDER BY scraped_at DESC LIMIT 1)
+        JOIN price_history ph2 ON ph2.id = (SELECT id FROM price_history WHERE product_id = p.id ORDER BY scraped_at DESC LIMIT 1 OFFSET 1)
+        WHERE ph1.price_numeric != ph2.price_numeric
     """)
 
+    # Color keyword lookup for bucketing color names into categories in SQL
+    print("[+] Seeding color_categories table...")
+    create_color_categories(cursor)
+
+    # Planner statistics for the indexes above
+    cursor.execute("ANALYZE")
+
     # Commit changes
     conn.commit()
 
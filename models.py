@@ -1,11 +1,11 @@
 """Data models for scraped fashion products."""
 
-from dataclasses import dataclass, asdict, field
+from dataclasses import dataclass, field
 from typing import List, Optional
 from datetime import datetime
 
 
-@dataclass
+@dataclass(slots=True)
 class Product:
     """Represents a fashion product from an e-commerce site."""
 
@@ -26,19 +26,35 @@ class Product:
 
     def to_dict(self):
         """Convert product to dictionary."""
-        data = asdict(self)
+        # Built field by field rather than with asdict(), which deep-copies
+        data = {
+            'name': self.name,
+            'main_category': self.main_category,
+            'clothing_type': self.clothing_type,
+            'price': self.price,
+            'original_price': self.original_price,
+            'colors': list(self.colors),
+            'sizes': list(self.sizes),
+            'brand': self.brand,
+            'image_url': self.image_url,
+            'product_url': self.product_url,
+            'availability': self.availability,
+            'description': self.description,
+            'site_name': self.site_name,
+            'scraped_at': self.scraped_at,
+        }
         # Convert lists to comma-separated strings for CSV compatibility
-        if data['colors']:
-            data['colors_list'] = ', '.join(data['colors'])
-        if data['sizes']:
-            data['sizes_list'] = ', '.join(data['sizes'])
+        if self.colors:
+            data['colors_list'] = ', '.join(self.colors)
+        if self.sizes:
+            data['sizes_list'] = ', '.join(self.sizes)
         return data
 
     def __repr__(self):
         return f"Product(name='{self.name}', category='{self.main_category}', type='{self.clothing_type}', price='{self.price}', colors={len(self.colors)})"
 
 
-@dataclass
+@dataclass(slots=True)
 class CategoryInfo:
     """Category information."""
     name: str
@@ -46,7 +62,7 @@ class CategoryInfo:
     parent_category: Optional[str] = None  # Men, Women, Kids
 
 
-@dataclass
+@dataclass(slots=True)
 class ScrapingResult:
     """Results from scraping a site."""
 
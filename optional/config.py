@@ -1,10 +1,12 @@
 """Configuration for the fashion site scraper."""
 
+import os
+
 SITES = {
     "fashionbug": {
         "url": "https://fashionbug.lk/",
         "name": "Fashion Bug",
-        "type": "shopify"
+        "type": "shopify"  # Read from the storefront JSON API, no browser needed
     },
     "thilakawardhana": {
         "url": "https://thilakawardhana.com/",
@@ -50,9 +52,14 @@ CLOTHING_TYPES = [
 # Scraping settings
 HEADLESS = True
 TIMEOUT = 60000  # 60 seconds
-WAIT_FOR_LOAD = 3000  # 3 seconds
+NAV_TIMEOUT = 15000  # Per-navigation cap; slow trackers no longer hold a page for TIMEOUT
+WAIT_FOR_LOAD = 8000  # Max wait for product markup once the DOM has loaded
 MAX_PRODUCTS_PER_CATEGORY = 30  # Limit per category
+SCRAPE_CONCURRENCY = int(os.getenv("SCRAPE_CONCURRENCY", "6"))  # Sites scraped at once
 
 # Output settings
 OUTPUT_DIR = "output"
+PROFILE_DIR = os.path.join(OUTPUT_DIR, ".profile")  # Persistent Chromium profile, keeps the HTTP cache warm
+CATEGORY_CACHE_FILE = os.path.join(OUTPUT_DIR, ".category_urls.json")  # Discovered category links per site
+CATEGORY_CACHE_TTL = 86400  # Seconds before category links are rediscovered
 OUTPUT_FORMAT = "json"  # json or csv
@@ -4,21 +4,20 @@ import asyncio
 from patchright.async_api import async_playwright
 
 
-async def diagnose_site(url, site_name):
+async def diagnose_site(browser, url, site_name):
     """Check how images are structured on a site."""
     print(f"\n{'='*60}")
     print(f"Diagnosing: {site_name}")
     print(f"URL: {url}")
     print(f"{'='*60}\n")
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=False)
-        page = await browser.new_page()
-        await page.set_viewport_size(dict(width=1920, height=1080))
+    context = await browser.new_context(viewport=dict(width=1920, height=1080))
+
+    try:
+        page = await context.new_page()
 
         print(f"Loading page...")
-        await page.goto(url, timeout=60000)
-        await asyncio.sleep(5)  # Let page fully load
+        await page.goto(url, timeout=60000, wait_until="domcontentloaded")
 
         # Try different product selectors
         selectors = [
@@ -45,7 +44,6 @@ async def diagnose_site(url, site_name):
 
         if not product_elements:
             print("[ERROR] No products found!")
-            await browser.close()
             return
 
         # Examine first 3 products in detail
@@ -88,23 +86,32 @@ async def diagnose_site(url, site_name):
         print("\n" + "="*60)
 
         input("\nPress Enter to close browser...")
-        await browser.close()
+    finally:
+        await context.close()
 
 
 async def main():
     """Diagnose both sites."""
 
-    # Diagnose Fashion Bug
-    await diagnose_site(
-        "https://fashionbug.lk/",
-        "Fashion Bug"
-    )
-
-    # Diagnose Thilaka Wardhana
-    await diagnose_site(
-        "https://thilakawardhana.com/",
-        "Thilaka Wardhana"
-    )
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=False)
+
+        try:
+            # Diagnose Fashion Bug
+            await diagnose_site(
+                browser,
+                "https://fashionbug.lk/",
+                "Fashion Bug"
+            )
+
+            # Diagnose Thilaka Wardhana
+            await diagnose_site(
+                browser,
+                "https://thilakawardhana.com/",
+                "Thilaka Wardhana"
+            )
+        finally:
+            await browser.close()
 
 
 if __name__ == "__main__":
@@ -1,60 +1,261 @@
-"""Quick diagnostic for Thilaka Wardhana images."""
+"""Diagnostics for Thilaka Wardhana product images and markup.
 
+Loads the page once and runs any of the overview, bg, img and html passes
+against it, e.g. ``python diagnose_thilaka.py --mode=bg --mode=html``.
+"""
+
+import argparse
 import asyncio
+import shutil
+from pathlib import Path
+
 from patchright.async_api import async_playwright
 
+from config import PROFILE_DIR
+from scraping import block_heavy_resources
+
+THILAKA_URL = "https://thilakawardhana.com/"
+
+
+async def load_thilaka(context):
+    """Open Thilaka Wardhana in a new page of the shared browser context."""
+    await context.route("**/*", block_heavy_resources)
+    page = await context.new_page()
+
+    print(f"Loading {THILAKA_URL}...")
+    await page.goto(THILAKA_URL, timeout=60000)
 
-async def main():
+    # Continue as soon as the product grid is in the DOM
+    try:
+        await page.wait_for_selector('.product-item', state='attached', timeout=15000)
+    except Exception:
+        print("No .product-item appeared within 15s")
+    return page
+
+
+async def inspect_overview(page):
     """Check Thilaka Wardhana image structure."""
-    url = "https://thilakawardhana.com/"
+    # Find products
+    selectors = ['.product-item', '.product-card', '.product', 'article.product', '.grid-item']
+    product_elements = []
+
+    for selector in selectors:
+        try:
+            await page.wait_for_selector(selector, timeout=5000)
+            product_elements = await page.query_selector_all(selector)
+            if product_elements:
+                print(f"Found {len(product_elements)} products using: '{selector}'\n")
+                break
+        except:
+            continue
+
+    if not product_elements:
+        print("No products found!")
+        return
+
+    # Check first product
+    elem = product_elements[0]
+    img_elements = await elem.query_selector_all('img')
+    print(f"First product has {len(img_elements)} img tags\n")
+
+    for idx, img in enumerate(img_elements[:2], 1):
+        print(f"Image {idx}:")
+        src = await img.get_attribute('src')
+        data_src = await img.get_attribute('data-src')
+        srcset = await img.get_attribute('srcset')
+        data_srcset = await img.get_attribute('data-srcset')
+
+        print(f"  src: {src}")
+        print(f"  data-src: {data_src}")
+        print(f"  srcset: {srcset[:100] if srcset else None}")
+        print(f"  data-srcset: {data_srcset[:100] if data_srcset else None}\n")
+
+
+# Collects the background styles and link of the first products in one round-trip
+PRODUCT_BACKGROUNDS_JS = """() => {
+    const products = [...document.querySelectorAll('.product-item')];
+    return {
+        count: products.length,
+        products: products.slice(0, 2).map(product => {
+            const bgs = [...product.querySelectorAll('[style*="background"]')];
+            const link = product.querySelector('a');
+            return {
+                bgCount: bgs.length,
+                bgs: bgs.slice(0, 5).map(el => ({
+                    style: el.getAttribute('style'),
+                    tag: el.tagName,
+                    cls: el.getAttribute('class'),
+                })),
+                href: link ? link.getAttribute('href') : null,
+                hasLink: link !== null,
+            };
+        }),
+    };
+}"""
+
+
+async def inspect_bg(page):
+    """Check for background images in Thilaka Wardhana products."""
+    data = await page.evaluate(PRODUCT_BACKGROUNDS_JS)
+    print(f"Found {data['count']} products\n")
+
+    # Check first 2 products
+    for pidx, product in enumerate(data['products'], 1):
+        print(f"\n{'='*80}")
+        print(f"Product {pidx}:")
+        print('='*80)
+
+        # Check for elements with background-image in style
+        if product['bgCount']:
+            print(f"Found {product['bgCount']} elements with background style:")
+            for idx, bg in enumerate(product['bgs'], 1):
+                print(f"\n  BG Element {idx} ({bg['tag']}):")
+                print(f"    class: {bg['cls']}")
+                print(f"    style: {bg['style']}")
+
+        # Also check for a tags with href (product links)
+        if product['hasLink']:
+            print(f"\n  Product Link: {product['href']}")
+
+
+# Collects every img attribute of the first product in one round-trip
+FIRST_PRODUCT_IMAGES_JS = """() => {
+    const products = document.querySelectorAll('.product-item');
+    const first = products[0];
+    return {
+        count: products.length,
+        images: first ? [...first.querySelectorAll('img')].map(img => ({
+            src: img.getAttribute('src'),
+            dataSrc: img.getAttribute('data-src'),
+            srcset: img.getAttribute('srcset'),
+            alt: img.getAttribute('alt'),
+            cls: img.getAttribute('class'),
+        })) : null,
+    };
+}"""
+
+
+async def inspect_imgs(page):
+    """Check all images in Thilaka Wardhana product cards."""
+    data = await page.evaluate(FIRST_PRODUCT_IMAGES_JS)
+    print(f"Found {data['count']} products\n")
+
+    if data['images'] is None:
+        print("No products found!")
+        return
+
+    # Check first product in detail
+    images = data['images']
+
+    print(f"Product 1 has {len(images)} img tags:")
+    print("="*80)
+
+    for idx, img in enumerate(images, 1):
+        srcset = img['srcset']
+
+        print(f"\nImage {idx}:")
+        print(f"  src: {img['src']}")
+        print(f"  data-src: {img['dataSrc']}")
+        print(f"  srcset: {srcset[:100] if srcset else None}...")
+        print(f"  alt: {img['alt']}")
+        print(f"  class: {img['cls']}")
+
+
+# Image selectors to try against the first product card
+IMAGE_SELECTORS = [
+    '.product-image',
+    '.product__image',
+    '.product-card__image',
+    '[data-product-image]',
+    'picture',
+    'picture img',
+    '.card__media img',
+    '.media img'
+]
+
+# Returns the first product's HTML and every selector hit in one round-trip
+FIRST_PRODUCT_HTML_JS = """(selectors) => {
+    const products = document.querySelectorAll('.product-item');
+    const first = products[0];
+    if (!first) {
+        return {count: 0, html: null, found: []};
+    }
+    const found = [];
+    for (const selector of selectors) {
+        const img = first.querySelector(selector);
+        if (img) {
+            found.push({
+                selector,
+                src: img.getAttribute('src'),
+                dataSrc: img.getAttribute('data-src'),
+                srcset: img.getAttribute('srcset'),
+            });
+        }
+    }
+    return {count: products.length, html: first.outerHTML, found};
+}"""
+
+
+async def dump_html(page):
+    """Get HTML of Thilaka Wardhana product."""
+    data = await page.evaluate(FIRST_PRODUCT_HTML_JS, IMAGE_SELECTORS)
+    print(f"Found {data['count']} products\n")
+
+    # Get HTML of first product
+    if data['html'] is not None:
+        # Save to file for easier reading, off the event loop
+        await asyncio.to_thread(Path('thilaka_product.html').write_text, data['html'], encoding='utf-8')
+
+        print("Saved HTML to thilaka_product.html")
+
+        # Try to find product image with different selectors
+        print("\nTrying different image selectors:")
+        for hit in data['found']:
+            srcset = hit['srcset']
+            print(f"\n[FOUND] {hit['selector']}:")
+            print(f"  src: {hit['src']}")
+            print(f"  data-src: {hit['dataSrc']}")
+            print(f"  srcset: {srcset[:80] if srcset else None}...")
+
+
+async def run_diagnostics(*diagnostics, fresh_profile=False):
+    """Run each diagnostic against one page load in the persistent profile."""
+    if fresh_profile:
+        shutil.rmtree(PROFILE_DIR, ignore_errors=True)
 
     async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page()
-        await page.set_viewport_size(dict(width=1920, height=1080))
-
-        print(f"Loading {url}...")
-        await page.goto(url, timeout=60000)
-        await asyncio.sleep(5)
-
-        # Find products
-        selectors = ['.product-item', '.product-card', '.product', 'article.product', '.grid-item']
-        product_elements = []
-
-        for selector in selectors:
-            try:
-                await page.wait_for_selector(selector, timeout=5000)
-                product_elements = await page.query_selector_all(selector)
-                if product_elements:
-                    print(f"Found {len(product_elements)} products using: '{selector}'\n")
-                    break
-            except:
-                continue
-
-        if not product_elements:
-            print("No products found!")
-            await browser.close()
-            return
-
-        # Check first product
-        elem = product_elements[0]
-        img_elements = await elem.query_selector_all('img')
-        print(f"First product has {len(img_elements)} img tags\n")
-
-        for idx, img in enumerate(img_elements[:2], 1):
-            print(f"Image {idx}:")
-            src = await img.get_attribute('src')
-            data_src = await img.get_attribute('data-src')
-            srcset = await img.get_attribute('srcset')
-            data_srcset = await img.get_attribute('data-srcset')
-
-            print(f"  src: {src}")
-            print(f"  data-src: {data_src}")
-            print(f"  srcset: {srcset[:100] if srcset else None}")
-            print(f"  data-srcset: {data_srcset[:100] if data_srcset else None}\n")
-
-        await browser.close()
+        context = await p.chromium.launch_persistent_context(
+            PROFILE_DIR,
+            headless=True,
+            viewport=dict(width=1920, height=1080)
+        )
+
+        try:
+            page = await load_thilaka(context)
+            for diagnostic in diagnostics:
+                await diagnostic(page)
+        finally:
+            await context.close()
+
+
+MODES = {
+    "overview": inspect_overview,
+    "bg": inspect_bg,
+    "img": inspect_imgs,
+    "html": dump_html,
+}
+
+
+async def main(modes=tuple(MODES), fresh_profile=False):
+    """Run the requested diagnostic passes against one page load."""
+    await run_diagnostics(*(MODES[mode] for mode in modes), fresh_profile=fresh_profile)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Diagnose Thilaka Wardhana product markup")
+    parser.add_argument("--mode", action="append", choices=list(MODES),
+                        help="pass to run; repeat for several (default: all)")
+    parser.add_argument("--fresh", action="store_true",
+                        help=f"wipe the browser profile in {PROFILE_DIR} first")
+    args = parser.parse_args()
+    asyncio.run(main(args.mode or tuple(MODES), fresh_profile=args.fresh))
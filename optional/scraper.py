@@ -1,85 +1,291 @@
 """Main scraper using Patchwright and AgentQL."""
 
+import argparse
 import asyncio
+import csv
+import hashlib
 import os
 import re
+import shutil
+from collections import Counter
+from functools import lru_cache
+from itertools import chain
 from pathlib import Path
 from typing import List, Optional, Dict
-import json
 
-from playwright.async_api import async_playwright, Page
+import orjson
+from playwright.async_api import async_playwright, BrowserContext, Page
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 import agentql
 from patchright.async_api import async_playwright as async_patchwright
+from patchright.async_api import TimeoutError as PatchrightTimeoutError
 
 from models import Product, ScrapingResult, CategoryInfo
 from config import (
-    SITES, HEADLESS, TIMEOUT, WAIT_FOR_LOAD, OUTPUT_DIR,
-    MAX_PRODUCTS_PER_CATEGORY, MAIN_CATEGORIES, CLOTHING_TYPES
+    SITES, HEADLESS, TIMEOUT, NAV_TIMEOUT, WAIT_FOR_LOAD, OUTPUT_DIR, PROFILE_DIR,
+    MAX_PRODUCTS_PER_CATEGORY, MAIN_CATEGORIES, CLOTHING_TYPES, SCRAPE_CONCURRENCY
 )
+from storefront import (
+    COLOR_OPTION_NAMES, SIZE_OPTION_NAMES, PRODUCTS_PAGE_SIZE, MAX_PRODUCTS_PAGES,
+    get_products_page, option_values,
+)
+from scraping import block_heavy_resources
+
+# AgentQL query to find navigation menu with categories
+NAV_QUERY = """
+{
+    navigation {
+        women_link
+        men_link
+        kids_link
+    }
+}
+"""
+
+# AgentQL query per main category for its link and subcategories, built once
+CATEGORY_QUERIES = {
+    main_cat: f"""
+{{
+    {main_cat.lower()}_category {{
+        link
+        subcategories[] {{
+            name
+            link
+        }}
+    }}
+}}
+"""
+    for main_cat in MAIN_CATEGORIES
+}
+
+# AgentQL query for products with categories and colors; the cap is
+# part of the query so AgentQL never resolves the rest of the grid
+PRODUCT_QUERY = f"""
+{{
+    products[] (only the first {MAX_PRODUCTS_PER_CATEGORY} products) {{
+        name
+        price
+        original_price
+        sale_price
+        colors[]
+        color_options[]
+        available_colors[]
+        sizes[]
+        size_options[]
+        brand
+        category
+        product_type
+        image
+        product_image
+        link
+        product_link
+        availability
+        in_stock
+    }}
+}}
+"""
+
+# Simpler fallback query structure, capped the same way
+ALT_QUERY = f"""
+{{
+    items[] (only the first {MAX_PRODUCTS_PER_CATEGORY} items) {{
+        title
+        product_title
+        price_text
+        current_price
+        image_url
+        thumbnail
+    }}
+}}
+"""
+
+# Markup that signals a listing page has rendered its products
+PRODUCT_READY_SELECTOR = '[class*="product"], .product-item, [data-product-id], .card'
+
+# Every clothing type as a zero-width alternation, so overlapping mentions
+# (Shirts inside T-Shirts) are all reported by a single finditer
+CLOTHING_TYPE_RE = re.compile(
+    "(?=(" + "|".join(re.escape(t) for t in CLOTHING_TYPES) + "))", re.IGNORECASE
+)
+CLOTHING_TYPE_PRIORITY = {t.lower(): i for i, t in enumerate(CLOTHING_TYPES)}
+
+# AgentQL fields that may hold a product's colors / sizes
+COLOR_FIELDS = ('colors', 'color_options', 'available_colors')
+SIZE_FIELDS = ('sizes', 'size_options')
+
+# Candidate AgentQL fields for each Product attribute, first populated wins
+PRICE_FIELDS = ('price', 'sale_price')
+IMAGE_FIELDS = ('image', 'product_image')
+LINK_FIELDS = ('link', 'product_link')
+AVAILABILITY_FIELDS = ('availability', 'in_stock')
+
+# Every PRODUCT_QUERY field read per product, each looked up exactly once
+PRODUCT_FIELDS = frozenset(
+    COLOR_FIELDS + SIZE_FIELDS + PRICE_FIELDS + IMAGE_FIELDS + LINK_FIELDS + AVAILABILITY_FIELDS
+    + ('name', 'original_price', 'brand', 'category')
+)
+
+
+def _first(fields: Dict, keys) -> Optional[str]:
+    """First populated value among the candidate keys."""
+    return next((fields[k] for k in keys if fields[k]), None)
+
+
+def _collect_values(fields: Dict, keys) -> List[str]:
+    """Gather every value of the given fields as strings, de-duplicated in first-seen order."""
+    values = list(chain.from_iterable(
+        map(str, value) if isinstance(value, list) else (str(value),)
+        for value in (fields[k] for k in keys)
+        if value
+    ))
+    return list(dict.fromkeys(values)) if len(values) > 1 else values
+
+
+def product_key(name: str, product_url: Optional[str]) -> bytes:
+    """Compact fingerprint identifying a product by name and URL."""
+    return hashlib.blake2b(f"{name}|{product_url}".encode(), digest_size=12).digest()
+
+
+@lru_cache(maxsize=32)
+def _query_digest(query: str) -> str:
+    """Short stable key for an AgentQL query string."""
+    return hashlib.blake2b(query.encode(), digest_size=8).hexdigest()
+
+
+def _format_price(value) -> Optional[str]:
+    """Render a storefront JSON price such as "2490.00" as "Rs 2,490.00"."""
+    try:
+        return f"Rs {float(value):,.2f}" if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def write_csv(filepath: Path, rows: List[Dict]):
+    """Write product dicts straight to CSV, one row per dict, without a DataFrame.
+
+    The header is every key of every row in order of first appearance,
+    as DataFrame.to_csv would produce: Product.to_dict only adds
+    colors_list / sizes_list when a product has them. Missing cells are
+    left empty.
+    """
+    fieldnames = list(dict.fromkeys(chain.from_iterable(rows)))
+    with open(filepath, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, lineterminator=os.linesep)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def write_combined_json(filepath: Path, total_sites: int, total_products: int, site_dicts: List[Dict]):
+    """Write the combined results file, serializing one site at a time.
+
+    Produces the same bytes as dumping the whole document with
+    OPT_INDENT_2 without ever holding the full encoded file in memory.
+    """
+    with open(filepath, 'wb') as f:
+        f.write(b'{\n  "total_sites": %d,\n  "total_products": %d,\n  "sites": [' % (total_sites, total_products))
+        for i, site in enumerate(site_dicts):
+            f.write(b',\n    ' if i else b'\n    ')
+            # Nest the site's indented JSON two levels deeper; encoded JSON
+            # strings never contain a raw newline
+            f.write(orjson.dumps(site, option=orjson.OPT_INDENT_2).replace(b'\n', b'\n    '))
+        f.write(b'\n  ]\n}' if site_dicts else b']\n}')
 
 
 class FashionScraper:
     """Scraper for fashion e-commerce sites using AgentQL."""
 
-    def __init__(self, use_stealth: bool = True):
+    def __init__(self, use_stealth: bool = True, fresh_profile: bool = False):
         self.use_stealth = use_stealth
+        self.fresh_profile = fresh_profile
         self.results = []
+        # AgentQL responses keyed by (page url, query digest); a page's
+        # entries are dropped when it navigates so element handles never
+        # go stale, without touching the other sites' pages
+        self._response_cache = {}
 
-    async def scrape_site(self, site_key: str) -> ScrapingResult:
-        """Scrape a single site."""
+    async def scrape_site(self, site_key: str, context: BrowserContext) -> ScrapingResult:
+        """Scrape a single site in its own page on the shared browser profile."""
         site_config = SITES[site_key]
         print(f"\n{'='*60}")
         print(f"Scraping {site_config['name']} ({site_config['url']})")
         print(f"{'='*60}")
 
+        # Shopify storefronts are read from their JSON API, without a page
+        if site_config.get('type') == 'shopify':
+            result = await self._scrape_products_json(site_config)
+            if result is not None:
+                return result
+
         products = []
+        seen = set()
         errors = []
         categories_scraped = []
 
         try:
-            # Choose playwright implementation
-            playwright_context = async_patchwright() if self.use_stealth else async_playwright()
+            page = await context.new_page()
 
-            async with playwright_context as p:
-                browser = await p.chromium.launch(headless=HEADLESS)
-                page = await browser.new_page()
-                await page.set_viewport_size({"width": 1920, "height": 1080})
+            try:
+                last_url = page.url
+
+                def forget_previous_page(frame):
+                    nonlocal last_url
+                    # Iframe and ad-frame navigations leave the page's DOM alone
+                    if frame == page.main_frame:
+                        self._forget_responses(last_url)
+                        last_url = frame.url
+
+                page.on("framenavigated", forget_previous_page)
                 agentql_page = agentql.wrap(page)
 
+                # Navigate to site
+                print(f"Loading {site_config['url']}...")
+                page.set_default_navigation_timeout(NAV_TIMEOUT)
                 try:
-                    # Navigate to site
-                    print(f"Loading {site_config['url']}...")
-                    await agentql_page.goto(site_config['url'], timeout=TIMEOUT, wait_until="networkidle")
-                    await asyncio.sleep(WAIT_FOR_LOAD / 1000)
-
-                    # Find and scrape categories
-                    categories = await self._find_categories(agentql_page, site_config['name'])
-
-                    print(f"\nFound {len(categories)} categories to scrape")
-
-                    # Scrape each category
-                    for category in categories:
-                        print(f"\n[CATEGORY] Scraping: {category.parent_category} > {category.name}")
-                        category_products = await self._scrape_category(
-                            agentql_page,
-                            category,
-                            site_config['name']
-                        )
+                    await agentql_page.goto(site_config['url'], wait_until="domcontentloaded")
+                except (PlaywrightTimeoutError, PatchrightTimeoutError):
+                    print(f"  Still loading after {NAV_TIMEOUT / 1000:.0f}s, continuing with what has rendered")
+
+                # Query as soon as product markup is in the DOM rather than
+                # after a fixed settle delay
+                try:
+                    await agentql_page.wait_for_selector(PRODUCT_READY_SELECTOR, timeout=WAIT_FOR_LOAD)
+                except Exception:
+                    print("  No product markup yet, querying the page as loaded")
+
+                # Find and scrape categories
+                categories = await self._find_categories(agentql_page, site_config['name'])
+
+                print(f"\nFound {len(categories)} categories to scrape")
+
+                # Scrape each category
+                for category in categories:
+                    print(f"\n[CATEGORY] Scraping: {category.parent_category} > {category.name}")
+                    category_products = await self._scrape_category(
+                        agentql_page,
+                        category,
+                        site_config['name']
+                    )
 
-                        if category_products:
-                            products.extend(category_products)
-                            categories_scraped.append(f"{category.parent_category}/{category.name}")
-                            print(f"   [OK] Found {len(category_products)} products")
+                    if category_products:
+                        # The same product is often listed under several categories
+                        for product in category_products:
+                            key = product_key(product.name, product.product_url)
+                            if key not in seen:
+                                seen.add(key)
+                                products.append(product)
+                        categories_scraped.append(f"{category.parent_category}/{category.name}")
+                        print(f"   [OK] Found {len(category_products)} products")
 
-                    print(f"\n[SUCCESS] Total products scraped: {len(products)}")
+                print(f"\n[SUCCESS] Total products scraped: {len(products)}")
 
-                except Exception as e:
-                    error_msg = f"Error scraping {site_config['name']}: {str(e)}"
-                    print(f"[ERROR] {error_msg}")
-                    errors.append(error_msg)
+            except Exception as e:
+                error_msg = f"Error scraping {site_config['name']}: {str(e)}"
+                print(f"[ERROR] {error_msg}")
+                errors.append(error_msg)
 
-                finally:
-                    await browser.close()
+            finally:
+                self._forget_responses(page.url)
+                await page.close()
 
         except Exception as e:
             error_msg = f"Fatal error with {site_config['name']}: {str(e)}"
@@ -95,38 +301,122 @@ class FashionScraper:
             errors=errors
         )
 
+    async def _scrape_products_json(self, site_config: Dict) -> Optional[ScrapingResult]:
+        """Read a Shopify site's products from its storefront JSON API.
+
+        Pages through /products.json, keeping at most
+        MAX_PRODUCTS_PER_CATEGORY products per main category like the
+        browser path. Returns None when the endpoint is missing or refuses
+        the first request, so the caller falls back to the browser.
+        """
+        print(f"Fetching {site_config['url'].rstrip('/')}/products.json...")
+
+        products = []
+        errors = []
+        per_category = Counter()
+
+        for page in range(1, MAX_PRODUCTS_PAGES + 1):
+            items = await get_products_page(site_config['url'], page, timeout=TIMEOUT / 1000)
+            if items is None:
+                if page == 1:
+                    print("  JSON API unavailable, falling back to the browser")
+                    return None
+                error_msg = f"products.json page {page} unavailable, kept the first {len(products)} products"
+                print(f"  [!] {error_msg}")
+                errors.append(error_msg)
+                break
+
+            for item in items:
+                product = self._product_from_json(item, site_config)
+                if per_category[product.main_category] < MAX_PRODUCTS_PER_CATEGORY:
+                    per_category[product.main_category] += 1
+                    products.append(product)
+
+            # Stop at the last page, or once every main category is full
+            if len(items) < PRODUCTS_PAGE_SIZE or all(
+                per_category[category] >= MAX_PRODUCTS_PER_CATEGORY for category in MAIN_CATEGORIES
+            ):
+                break
+
+        categories_scraped = sorted({p.main_category for p in products if p.main_category})
+        print(f"\n[SUCCESS] Total products scraped: {len(products)}")
+
+        return ScrapingResult(
+            site_name=site_config['name'],
+            site_url=site_config['url'],
+            products=products,
+            total_products=len(products),
+            categories_scraped=categories_scraped,
+            errors=errors
+        )
+
+    def _product_from_json(self, item: Dict, site_config: Dict) -> Product:
+        """Map one storefront JSON product onto a Product."""
+        name = item.get('title') or ''
+        variants = item.get('variants') or []
+        first = variants[0] if variants else {}
+
+        colors = option_values(item, COLOR_OPTION_NAMES) or []
+        sizes = option_values(item, SIZE_OPTION_NAMES) or []
+
+        # Main category from the product's tags/type, e.g. "Women"
+        tags = {t.lower() for t in item.get('tags') or []}
+        tags.add((item.get('product_type') or '').lower())
+        main_category = next((c for c in MAIN_CATEGORIES if c.lower() in tags), None)
+
+        images = item.get('images') or []
+        handle = item.get('handle')
+
+        return Product(
+            name=name,
+            main_category=main_category,
+            clothing_type=self._extract_clothing_type(name, item.get('product_type') or ''),
+            price=_format_price(first.get('price')),
+            original_price=_format_price(first.get('compare_at_price')),
+            colors=colors,
+            sizes=sizes,
+            brand=item.get('vendor'),
+            image_url=images[0].get('src') if images else None,
+            product_url=f"{site_config['url'].rstrip('/')}/products/{handle}" if handle else None,
+            availability="In Stock" if any(v.get('available') for v in variants) else "Out of Stock",
+            site_name=site_config['name']
+        )
+
+    def _forget_responses(self, url: str):
+        """Drop the cached AgentQL responses for one page URL."""
+        for key in [key for key in self._response_cache if key[0] == url]:
+            del self._response_cache[key]
+
+    async def _query_elements(self, page: Page, query: str):
+        """Run an AgentQL query, reusing the outcome for the same page and query.
+
+        Failures and empty answers are remembered too, so a query that
+        already failed against this page goes straight to the fallback
+        instead of making AgentQL snapshot the page again.
+        """
+        key = (page.url, _query_digest(query))
+        if key not in self._response_cache:
+            try:
+                self._response_cache[key] = await page.query_elements(query)
+            except Exception as e:
+                self._response_cache[key] = e
+
+        response = self._response_cache[key]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
     async def _find_categories(self, page: Page, site_name: str) -> List[CategoryInfo]:
         """Find category links on the page."""
         categories = []
 
-        # AgentQL query to find navigation menu with categories
-        NAV_QUERY = """
-        {
-            navigation {
-                women_link
-                men_link
-                kids_link
-            }
-        }
-        """
-
         try:
             print("Looking for category navigation...")
 
             # Try to find main category links
             for main_cat in MAIN_CATEGORIES:
                 # Look for category link using AgentQL
-                CATEGORY_QUERY = f"""
-                {{
-                    {main_cat.lower()}_category {{
-                        link
-                        subcategories[] {{
-                            name
-                            link
-                        }}
-                    }}
-                }}
-                """
+                category_query = CATEGORY_QUERIES[main_cat]
 
                 try:
                     # For now, create a simple category list based on common patterns
@@ -152,79 +442,34 @@ class FashionScraper:
         """Scrape products from a category page."""
         products = []
 
-        # AgentQL query for products with categories and colors
-        PRODUCT_QUERY = """
-        {
-            products[] {
-                name
-                price
-                original_price
-                sale_price
-                colors[]
-                color_options[]
-                available_colors[]
-                sizes[]
-                size_options[]
-                brand
-                category
-                product_type
-                image
-                product_image
-                link
-                product_link
-                availability
-                in_stock
-            }
-        }
-        """
-
         try:
             print(f"  Querying products...")
-            response = await page.query_elements(PRODUCT_QUERY)
+            response = await self._query_elements(page, PRODUCT_QUERY)
 
             if response and hasattr(response, 'products'):
+                # The in-query cap is a hint to AgentQL; keep the hard limit
                 product_elements = response.products[:MAX_PRODUCTS_PER_CATEGORY]
 
                 for idx, elem in enumerate(product_elements, 1):
                     try:
+                        # Resolve every field once, then pick from the lookup tables
+                        fields = {f: getattr(elem, f, None) for f in PRODUCT_FIELDS}
+
                         # Extract product name
-                        name = getattr(elem, 'name', '').strip() if hasattr(elem, 'name') else f"Product {idx}"
+                        name = fields['name'].strip() if fields['name'] is not None else f"Product {idx}"
 
                         # Extract price (try multiple fields)
-                        price = None
-                        for price_field in ['price', 'sale_price']:
-                            if hasattr(elem, price_field):
-                                price = getattr(elem, price_field)
-                                if price:
-                                    break
+                        price = _first(fields, PRICE_FIELDS)
 
                         # Extract original price
-                        original_price = getattr(elem, 'original_price', None)
-
-                        # Extract colors (try multiple fields)
-                        colors = []
-                        for color_field in ['colors', 'color_options', 'available_colors']:
-                            if hasattr(elem, color_field):
-                                field_value = getattr(elem, color_field)
-                                if field_value:
-                                    if isinstance(field_value, list):
-                                        colors.extend([str(c) for c in field_value])
-                                    else:
-                                        colors.append(str(field_value))
-
-                        # Extract sizes
-                        sizes = []
-                        for size_field in ['sizes', 'size_options']:
-                            if hasattr(elem, size_field):
-                                field_value = getattr(elem, size_field)
-                                if field_value:
-                                    if isinstance(field_value, list):
-                                        sizes.extend([str(s) for s in field_value])
-                                    else:
-                                        sizes.append(str(field_value))
+                        original_price = fields['original_price']
+
+                        # Extract colors and sizes (try multiple fields)
+                        colors = _collect_values(fields, COLOR_FIELDS)
+                        sizes = _collect_values(fields, SIZE_FIELDS)
 
                         # Determine clothing type from product name or category
-                        clothing_type = self._extract_clothing_type(name, getattr(elem, 'category', ''))
+                        clothing_type = self._extract_clothing_type(name, fields['category'] or '')
 
                         # Create product
                         product = Product(
@@ -233,12 +478,12 @@ class FashionScraper:
                             clothing_type=clothing_type,
                             price=price,
                             original_price=original_price,
-                            colors=list(set(colors)),  # Remove duplicates
-                            sizes=list(set(sizes)),
-                            brand=getattr(elem, 'brand', None),
-                            image_url=getattr(elem, 'image', None) or getattr(elem, 'product_image', None),
-                            product_url=getattr(elem, 'link', None) or getattr(elem, 'product_link', None),
-                            availability=getattr(elem, 'availability', None) or getattr(elem, 'in_stock', None),
+                            colors=colors,
+                            sizes=sizes,
+                            brand=fields['brand'],
+                            image_url=_first(fields, IMAGE_FIELDS),
+                            product_url=_first(fields, LINK_FIELDS),
+                            availability=_first(fields, AVAILABILITY_FIELDS),
                             site_name=site_name
                         )
 
@@ -264,22 +509,8 @@ class FashionScraper:
         """Alternative scraping method."""
         products = []
 
-        # Simpler query structure
-        ALT_QUERY = """
-        {
-            items[] {
-                title
-                product_title
-                price_text
-                current_price
-                image_url
-                thumbnail
-            }
-        }
-        """
-
         try:
-            response = await page.query_elements(ALT_QUERY)
+            response = await self._query_elements(page, ALT_QUERY)
 
             if response and hasattr(response, 'items'):
                 for idx, item in enumerate(response.items[:MAX_PRODUCTS_PER_CATEGORY], 1):
@@ -307,13 +538,11 @@ class FashionScraper:
 
     def _extract_clothing_type(self, product_name: str, category_name: str) -> Optional[str]:
         """Extract clothing type from product name or category."""
-        text = f"{product_name} {category_name}".lower()
+        text = f"{product_name} {category_name}"
 
-        for clothing_type in CLOTHING_TYPES:
-            if clothing_type.lower() in text:
-                return clothing_type
-
-        return None
+        # One scan finds every type mentioned; the earliest in CLOTHING_TYPES wins
+        found = [CLOTHING_TYPE_PRIORITY[m.group(1).lower()] for m in CLOTHING_TYPE_RE.finditer(text)]
+        return CLOTHING_TYPES[min(found)] if found else None
 
     async def scrape_all(self, site_keys: Optional[List[str]] = None) -> List[ScrapingResult]:
         """Scrape all configured sites or specified sites."""
@@ -323,9 +552,49 @@ class FashionScraper:
         print(f"\n>> Starting category-based scraping for {len(site_keys)} sites...")
         print(f">> Target categories: {', '.join(MAIN_CATEGORIES)}")
 
-        # Scrape sites sequentially
-        for site_key in site_keys:
-            result = await self.scrape_site(site_key)
+        if self.fresh_profile:
+            shutil.rmtree(PROFILE_DIR, ignore_errors=True)
+
+        # Choose playwright implementation; every site shares one persistent
+        # profile so repeat runs start from a warm HTTP cache
+        playwright_context = async_patchwright() if self.use_stealth else async_playwright()
+
+        async with playwright_context as p:
+            context = await p.chromium.launch_persistent_context(
+                PROFILE_DIR,
+                headless=HEADLESS,
+                viewport={"width": 1920, "height": 1080}
+            )
+            await context.route("**/*", block_heavy_resources)
+
+            # Scrape sites concurrently, at most SCRAPE_CONCURRENCY at a time
+            semaphore = asyncio.Semaphore(SCRAPE_CONCURRENCY)
+
+            async def run(site_key: str) -> ScrapingResult:
+                async with semaphore:
+                    return await self.scrape_site(site_key, context)
+
+            try:
+                results = await asyncio.gather(
+                    *(run(site_key) for site_key in site_keys),
+                    return_exceptions=True
+                )
+            finally:
+                await context.close()
+
+        for site_key, result in zip(site_keys, results):
+            if isinstance(result, BaseException):
+                site_config = SITES[site_key]
+                error_msg = f"Fatal error with {site_config['name']}: {str(result)}"
+                print(f"[FATAL] {error_msg}")
+                result = ScrapingResult(
+                    site_name=site_config['name'],
+                    site_url=site_config['url'],
+                    products=[],
+                    total_products=0,
+                    categories_scraped=[],
+                    errors=[error_msg]
+                )
             self.results.append(result)
 
         return self.results
@@ -337,54 +606,51 @@ class FashionScraper:
 
         print(f"\n[SAVE] Saving results to {output_path}/...")
 
-        for result in self.results:
+        # Convert every result once; the per-site files, the combined file
+        # and the combined CSV (de-duplicated across sites) all share these dicts
+        site_dicts = [r.to_dict() for r in self.results]
+        all_products = []
+        seen = set()
+        for site in site_dicts:
+            for p in site["products"]:
+                key = product_key(p["name"], p["product_url"])
+                if key not in seen:
+                    seen.add(key)
+                    all_products.append(p)
+
+        for result, site in zip(self.results, site_dicts):
             # Create filename-safe site name
             filename = result.site_name.lower().replace(" ", "_")
 
             if output_format == "json":
                 filepath = output_path / f"{filename}.json"
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    json.dump(result.to_dict(), f, indent=2, ensure_ascii=False)
+                filepath.write_bytes(orjson.dumps(site, option=orjson.OPT_INDENT_2))
                 print(f"  [OK] Saved {filepath}")
 
             elif output_format == "csv":
-                import pandas as pd
                 filepath = output_path / f"{filename}.csv"
-                if result.products:
-                    df = pd.DataFrame([p.to_dict() for p in result.products])
-                    df.to_csv(filepath, index=False, encoding='utf-8')
+                if site["products"]:
+                    write_csv(filepath, site["products"])
                     print(f"  [OK] Saved {filepath}")
 
-        # Save combined results
+        # Save combined results, one site at a time
         combined_file = output_path / "all_products.json"
-        all_products = []
-        for r in self.results:
-            all_products.extend([p.to_dict() for p in r.products])
-
-        combined_data = {
-            "total_sites": len(self.results),
-            "total_products": sum(r.total_products for r in self.results),
-            "sites": [r.to_dict() for r in self.results]
-        }
-
-        with open(combined_file, 'w', encoding='utf-8') as f:
-            json.dump(combined_data, f, indent=2, ensure_ascii=False)
+        total_products = sum(r.total_products for r in self.results)
+        write_combined_json(combined_file, len(self.results), total_products, site_dicts)
         print(f"  [OK] Saved combined results to {combined_file}")
 
         # Save combined CSV
         if all_products:
-            import pandas as pd
             combined_csv = output_path / "all_products.csv"
-            df = pd.DataFrame(all_products)
-            df.to_csv(combined_csv, index=False, encoding='utf-8')
+            write_csv(combined_csv, all_products)
             print(f"  [OK] Saved {combined_csv}")
 
-        print(f"\n[DONE] Total products scraped: {combined_data['total_products']}")
+        print(f"\n[DONE] Total products scraped: {total_products}")
 
 
-async def main():
+async def main(fresh_profile: bool = False):
     """Main function."""
-    scraper = FashionScraper(use_stealth=True)
+    scraper = FashionScraper(use_stealth=True, fresh_profile=fresh_profile)
 
     # Scrape all sites
     await scraper.scrape_all()
@@ -395,4 +661,8 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Scrape the configured fashion sites")
+    parser.add_argument("--fresh", action="store_true",
+                        help=f"wipe the browser profile in {PROFILE_DIR} before scraping")
+    args = parser.parse_args()
+    asyncio.run(main(fresh_profile=args.fresh))
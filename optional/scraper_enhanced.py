@@ -2,14 +2,79 @@
 
 import asyncio
 import json
-import re
+import time
 from pathlib import Path
 from typing import List, Optional, Dict
 
+import orjson
 from patchright.async_api import async_playwright
 
 from models import Product, ScrapingResult
-from config import SITES, HEADLESS, TIMEOUT, OUTPUT_DIR, MAIN_CATEGORIES
+from config import (
+    SITES, HEADLESS, TIMEOUT, OUTPUT_DIR, MAIN_CATEGORIES, SCRAPE_CONCURRENCY,
+    CATEGORY_CACHE_FILE, CATEGORY_CACHE_TTL, WAIT_FOR_LOAD,
+)
+from storefront import get_product_colors
+from scraping import (
+    PRICE_RE, words_re, new_scraping_context, CARD_SELECTORS, PRODUCT_CARDS_JS, PRODUCT_FORM_SELECTOR,
+    write_category_csvs,
+)
+
+# Category keywords checked in order against lowercased URLs / product names
+URL_CATEGORY_PATTERNS = (
+    ('Women', words_re('women', 'ladies')),
+    ('Men', words_re('men', 'mens', 'gents')),
+    ('Kids', words_re('kids', 'children')),
+)
+NAME_CATEGORY_PATTERNS = (
+    ('Women', words_re('women', 'ladies', 'womens')),
+    ('Men', words_re('mens', 'men', 'gents')),
+    ('Kids', words_re('kids', 'children')),
+)
+
+# Selectors tried in turn for color options on a product page
+COLOR_SELECTORS = (
+    '.color-swatch',
+    '.swatch-element',
+    '[data-option="Color"]',
+    '.product-form__input input[type="radio"]',
+    'input[name="Color"]',
+    '.variant-input-wrap input',
+)
+
+# Value, data-value, title or parent label text of each matched color option
+COLOR_VALUES_JS = """(els, maxColors) => els.slice(0, maxColors).map(el =>
+    el.getAttribute('value') || el.getAttribute('data-value') || el.getAttribute('title')
+        || (el.parentElement ? el.parentElement.innerText : null))"""
+
+# Selectors tried in turn for the product cards of a listing
+PRODUCT_SELECTORS = ('.product-item', '.product-card', '.product', 'article.product', '.grid-item')
+
+# Image URL fragments that mark payment gateway logos rather than products
+IMAGE_SKIP_TOKENS = ('mintpay', 'koko', 'payment', 'logo')
+
+
+def _load_category_cache() -> Dict[str, dict]:
+    """
+    Read the category-link cache written by earlier runs.
+
+    Entries look like ``{site_key: {category: url, ..., "_ts": epoch,
+    "_selector": product_card_selector}}``; a missing or unreadable file
+    is an empty cache.
+    """
+    try:
+        with open(CATEGORY_CACHE_FILE, encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def _save_category_cache(cache: Dict[str, dict]):
+    """Write the category-link cache for the next run."""
+    Path(CATEGORY_CACHE_FILE).parent.mkdir(parents=True, exist_ok=True)
+    with open(CATEGORY_CACHE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2, ensure_ascii=False)
 
 
 class EnhancedFashionScraper:
@@ -18,7 +83,8 @@ class EnhancedFashionScraper:
     def __init__(self, use_stealth: bool = True):
         self.use_stealth = use_stealth
         self.results = {}  # Organized by site and category
-        self.page = None
+        self.category_cache = {}  # site_key -> discovered category links, see _load_category_cache
+        self.product_selectors = {}  # site name -> product card selector that matched
 
     def clean_price(self, price_text: str) -> Optional[str]:
         """Extract just the main price from text."""
@@ -26,7 +92,7 @@ class EnhancedFashionScraper:
             return None
 
         # Find first price pattern (Rs X,XXX.XX)
-        match = re.search(r'Rs\s*([\d,]+\.?\d*)', price_text)
+        match = PRICE_RE.search(price_text)
         if match:
             return f"Rs {match.group(1)}"
         return None
@@ -34,142 +100,126 @@ class EnhancedFashionScraper:
     def detect_category_from_url(self, url: str) -> Optional[str]:
         """Detect category from URL."""
         url_lower = url.lower()
-        if 'women' in url_lower or 'ladies' in url_lower:
-            return 'Women'
-        elif 'men' in url_lower or 'mens' in url_lower or 'gents' in url_lower:
-            return 'Men'
-        elif 'kids' in url_lower or 'children' in url_lower:
-            return 'Kids'
-        return None
+        return next((category for category, pattern in URL_CATEGORY_PATTERNS if pattern.search(url_lower)), None)
 
     def detect_category_from_name(self, name: str) -> Optional[str]:
         """Detect category from product name."""
         name_lower = name.lower()
-        if 'women' in name_lower or 'ladies' in name_lower or 'womens' in name_lower:
-            return 'Women'
-        elif 'mens' in name_lower or 'men' in name_lower or 'gents' in name_lower:
-            return 'Men'
-        elif 'kids' in name_lower or 'children' in name_lower:
-            return 'Kids'
-        return None
+        return next((category for category, pattern in NAME_CATEGORY_PATTERNS if pattern.search(name_lower)), None)
 
-    async def extract_colors_from_product_page(self, product_url: str, max_colors: int = 10) -> List[str]:
+    async def extract_colors_from_product_page(self, page, product_url: str, max_colors: int = 10) -> List[str]:
         """Visit product page and extract available colors."""
         colors = []
+        seen = set()
         try:
-            await self.page.goto(product_url, timeout=30000, wait_until="domcontentloaded")
-            await asyncio.sleep(1)
+            await page.goto(product_url, timeout=30000, wait_until="domcontentloaded")
+            # The add-to-cart form marks a rendered product page
+            try:
+                await page.wait_for_selector(PRODUCT_FORM_SELECTOR, timeout=5000)
+            except:
+                pass
 
             # Try multiple selectors for color options
-            color_selectors = [
-                '.color-swatch',
-                '.swatch-element',
-                '[data-option="Color"]',
-                '.product-form__input input[type="radio"]',
-                'input[name="Color"]',
-                '.variant-input-wrap input',
-            ]
-
-            for selector in color_selectors:
+            for selector in COLOR_SELECTORS:
                 try:
-                    elements = await self.page.query_selector_all(selector)
-                    if elements:
-                        for elem in elements[:max_colors]:
-                            color_value = await elem.get_attribute('value')
-                            if not color_value:
-                                color_value = await elem.get_attribute('data-value')
-                            if not color_value:
-                                color_value = await elem.get_attribute('title')
-                            if not color_value:
-                                label = await elem.query_selector('..') # parent
-                                if label:
-                                    color_value = await label.inner_text()
-
-                            if color_value:
-                                color_value = color_value.strip()
-                                if color_value and color_value not in colors:
-                                    colors.append(color_value)
-
-                        if colors:
-                            break
+                    # All candidate values of the matches in one round-trip
+                    values = await page.eval_on_selector_all(selector, COLOR_VALUES_JS, max_colors)
+                    for color_value in values:
+                        if color_value:
+                            color_value = color_value.strip()
+                            if color_value and color_value not in seen:
+                                seen.add(color_value)
+                                colors.append(color_value)
+                                if len(colors) >= max_colors:
+                                    break
+
+                    if colors:
+                        break
                 except:
                     continue
 
         except Exception as e:
             print(f"    [!] Error extracting colors: {e}")
 
-        return colors[:max_colors]
+        return colors
 
-    async def scrape_category_page(self, category_url: str, category_name: str, site_name: str, limit: int = 20) -> List[Product]:
+    async def scrape_category_page(self, page, category_url: str, category_name: str, site_name: str, limit: int = 20,
+                                   selectors=PRODUCT_SELECTORS, shopify: bool = False) -> List[Product]:
         """Scrape products from a specific category page."""
         products = []
+        detail_page = None  # Second tab for product pages, so the listing never reloads
 
         try:
             print(f"  Loading category: {category_name}")
-            await self.page.goto(category_url, timeout=TIMEOUT, wait_until="networkidle")
-            await asyncio.sleep(2)
+            await page.goto(category_url, timeout=TIMEOUT, wait_until="domcontentloaded")
 
             # Find product elements
-            selectors = ['.product-item', '.product-card', '.product', 'article.product', '.grid-item']
-            product_elements = []
+            cards = None
+
+            # Wait once for any card selector, then take the first that matches
+            try:
+                await page.wait_for_selector(', '.join(selectors), timeout=WAIT_FOR_LOAD)
+            except:
+                pass
 
             for selector in selectors:
                 try:
-                    await self.page.wait_for_selector(selector, timeout=5000)
-                    product_elements = await self.page.query_selector_all(selector)
-                    if product_elements:
-                        print(f"  Found {len(product_elements)} products in {category_name}")
+                    # Every card's fields in one round-trip
+                    cards = await page.eval_on_selector_all(selector, PRODUCT_CARDS_JS, [limit, CARD_SELECTORS])
+                    if cards['count']:
+                        print(f"  Found {cards['count']} products in {category_name}")
+                        self.product_selectors[site_name] = selector
                         break
                 except:
                     continue
 
-            if not product_elements:
+            if not cards or not cards['count']:
                 print(f"  No products found in {category_name}")
                 return products
 
+            base_url = page.url.split('/')[0] + '//' + page.url.split('/')[2]
+
             # Extract products
-            for idx, elem in enumerate(product_elements[:limit], 1):
+            for idx, card in enumerate(cards['items'], 1):
                 try:
                     # Extract name
-                    name_elem = await elem.query_selector('h2, h3, .product-title, .product-name, a[href*="/products/"]')
-                    name = await name_elem.inner_text() if name_elem else f"Product {idx}"
+                    name = card['name'] if card['name'] is not None else f"Product {idx}"
                     name = name.strip()
 
                     # Extract price
-                    price_elem = await elem.query_selector('.price, [class*="price"]')
-                    price_text = await price_elem.inner_text() if price_elem else None
+                    price_text = card['price']
                     price = self.clean_price(price_text) if price_text else None
 
                     # Extract product image (not payment logos!)
                     image_url = None
-                    img_elem = await elem.query_selector('img')
-                    if img_elem:
-                        src = await img_elem.get_attribute('src')
-                        # Filter out payment gateway logos
-                        if src and not any(x in src.lower() for x in ['mintpay', 'koko', 'payment', 'logo']):
-                            if not src.startswith('http'):
-                                src = 'https:' + src if src.startswith('//') else src
-                            image_url = src
+                    src = card['imgs'][0]['src'] if card['imgs'] else None  # the card's first image
+                    # Filter out payment gateway logos
+                    if src and not any(x in src.lower() for x in IMAGE_SKIP_TOKENS):
+                        if not src.startswith('http'):
+                            src = 'https:' + src if src.startswith('//') else src
+                        image_url = src
 
                     # Extract product URL
-                    link_elem = await elem.query_selector('a[href*="/products/"]')
                     product_url = None
-                    if link_elem:
-                        href = await link_elem.get_attribute('href')
-                        if href:
-                            if not href.startswith('http'):
-                                base_url = self.page.url.split('/')[0] + '//' + self.page.url.split('/')[2]
-                                product_url = base_url + href
-                            else:
-                                product_url = href
+                    href = card['href']
+                    if href:
+                        if not href.startswith('http'):
+                            product_url = base_url + href
+                        else:
+                            product_url = href
 
                     # Try to get colors (only for first few products to save time)
                     colors = []
                     if product_url and idx <= 5:  # Get colors for first 5 products
-                        colors = await self.extract_colors_from_product_page(product_url)
-                        # Go back to category page
-                        await self.page.goto(category_url, timeout=30000, wait_until="domcontentloaded")
-                        await asyncio.sleep(1)
+                        # Shopify storefront JSON first; render the product page for
+                        # other platforms or if that fails
+                        colors = await get_product_colors(product_url) if shopify else None
+                        if colors is not None:
+                            colors = colors[:10]
+                        else:
+                            if detail_page is None:
+                                detail_page = await page.context.new_page()
+                            colors = await self.extract_colors_from_product_page(detail_page, product_url)
 
                     product = Product(
                         name=name,
@@ -192,9 +242,60 @@ class EnhancedFashionScraper:
         except Exception as e:
             print(f"  [ERROR] Failed to scrape {category_name}: {e}")
 
+        finally:
+            if detail_page is not None:
+                await detail_page.close()
+
         return products
 
-    async def scrape_site(self, site_key: str) -> Dict[str, List[Product]]:
+    async def discover_category_urls(self, site_config: dict, browser) -> Dict[str, str]:
+        """Find each main category's link on a site's homepage."""
+        category_urls = {}
+        context = await new_scraping_context(browser)
+        page = await context.new_page()
+
+        try:
+            # Navigate to homepage first
+            print(f"Loading {site_config['url']}...")
+            await page.goto(site_config['url'], timeout=TIMEOUT, wait_until="domcontentloaded")
+
+            # Find category links
+            for category in MAIN_CATEGORIES:
+                category_url = None
+
+                # Try to find category link
+                category_patterns = [
+                    f'a[href*="/{category.lower()}"]',
+                    f'a[href*="/collections/{category.lower()}"]',
+                    f'a:has-text("{category}")',
+                ]
+
+                for pattern in category_patterns:
+                    try:
+                        link = await page.query_selector(pattern)
+                        if link:
+                            href = await link.get_attribute('href')
+                            if href:
+                                if not href.startswith('http'):
+                                    base_url = site_config['url'].rstrip('/')
+                                    category_url = base_url + href
+                                else:
+                                    category_url = href
+                                break
+                    except:
+                        continue
+
+                if category_url:
+                    category_urls[category] = category_url
+                else:
+                    print(f"  [!] Could not find {category} category link")
+
+        finally:
+            await context.close()
+
+        return category_urls
+
+    async def scrape_site(self, site_key: str, browser) -> Dict[str, List[Product]]:
         """Scrape a site organized by category."""
         site_config = SITES[site_key]
         print(f"\n{'='*60}")
@@ -204,57 +305,43 @@ class EnhancedFashionScraper:
         site_products = {cat: [] for cat in MAIN_CATEGORIES}
 
         try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=HEADLESS)
-                self.page = await browser.new_page()
-                await self.page.set_viewport_size(dict(width=1920, height=1080))
-
-                try:
-                    # Navigate to homepage first
-                    print(f"Loading {site_config['url']}...")
-                    await self.page.goto(site_config['url'], timeout=TIMEOUT, wait_until="networkidle")
-                    await asyncio.sleep(2)
-
-                    # Find category links
-                    for category in MAIN_CATEGORIES:
-                        category_url = None
-
-                        # Try to find category link
-                        category_patterns = [
-                            f'a[href*="/{category.lower()}"]',
-                            f'a[href*="/collections/{category.lower()}"]',
-                            f'a:has-text("{category}")',
-                        ]
-
-                        for pattern in category_patterns:
-                            try:
-                                link = await self.page.query_selector(pattern)
-                                if link:
-                                    href = await link.get_attribute('href')
-                                    if href:
-                                        if not href.startswith('http'):
-                                            base_url = site_config['url'].rstrip('/')
-                                            category_url = base_url + href
-                                        else:
-                                            category_url = href
-                                        break
-                            except:
-                                continue
-
-                        if category_url:
-                            products = await self.scrape_category_page(category_url, category, site_config['name'], limit=15)
-                            site_products[category] = products
-                        else:
-                            print(f"  [!] Could not find {category} category link")
-
-                except Exception as e:
-                    print(f"[ERROR] Error scraping {site_config['name']}: {e}")
-
-                finally:
-                    await browser.close()
+            cached = self.category_cache.get(site_key)
+            if cached and time.time() - cached.get('_ts', 0) < CATEGORY_CACHE_TTL:
+                print("Using cached category links")
+                category_urls = {cat: cached[cat] for cat in MAIN_CATEGORIES if cached.get(cat)}
+            else:
+                cached = None
+                category_urls = await self.discover_category_urls(site_config, browser)
+                if category_urls:
+                    self.category_cache[site_key] = {**category_urls, '_ts': time.time()}
+
+            # Try the card selector that matched last time before the others
+            selectors = PRODUCT_SELECTORS
+            known_selector = (cached or {}).get('_selector')
+            if known_selector:
+                selectors = (known_selector,) + tuple(s for s in PRODUCT_SELECTORS if s != known_selector)
+
+            # Scrape the categories concurrently, each in its own context
+            category_contexts = [await new_scraping_context(browser) for _ in category_urls]
+            try:
+                pages = [await category_context.new_page() for category_context in category_contexts]
+                results = await asyncio.gather(*(
+                    self.scrape_category_page(category_page, category_url, category, site_config['name'],
+                                              limit=15, selectors=selectors,
+                                              shopify=site_config.get('type') == 'shopify')
+                    for category_page, (category, category_url) in zip(pages, category_urls.items())
+                ))
+                site_products.update(zip(category_urls, results))
+            finally:
+                for category_context in category_contexts:
+                    await category_context.close()
+
+            selector = self.product_selectors.get(site_config['name'])
+            if selector and site_key in self.category_cache:
+                self.category_cache[site_key]['_selector'] = selector
 
         except Exception as e:
-            print(f"[FATAL] Fatal error with {site_config['name']}: {e}")
+            print(f"[ERROR] Error scraping {site_config['name']}: {e}")
 
         return site_products
 
@@ -265,9 +352,27 @@ class EnhancedFashionScraper:
 
         print(f"\n>> Starting enhanced category-based scraping for {len(site_keys)} sites...")
 
-        for site_key in site_keys:
-            site_products = await self.scrape_site(site_key)
-            self.results[site_key] = site_products
+        # Category links found by earlier runs
+        self.category_cache = _load_category_cache()
+
+        # Scrape sites concurrently, at most SCRAPE_CONCURRENCY at a time
+        semaphore = asyncio.Semaphore(SCRAPE_CONCURRENCY)
+
+        # One browser for every site; each site gets its own context
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=HEADLESS)
+
+            async def run(site_key: str) -> Dict[str, List[Product]]:
+                async with semaphore:
+                    return await self.scrape_site(site_key, browser)
+
+            try:
+                results = await asyncio.gather(*(run(site_key) for site_key in site_keys))
+            finally:
+                await browser.close()
+
+        self.results.update(zip(site_keys, results))
+        _save_category_cache(self.category_cache)
 
         return self.results
 
@@ -278,6 +383,7 @@ class EnhancedFashionScraper:
 
         print(f"\n[SAVE] Saving results to {output_path}/...")
 
+        rows = []  # Every product's to_dict, shared by the JSON and CSV writers
         for site_key, categories in self.results.items():
             site_name = SITES[site_key]['name']
             site_name_clean = site_name.lower().replace(" ", "_")
@@ -289,25 +395,23 @@ class EnhancedFashionScraper:
 
                     # Save JSON
                     json_file = output_path / f"{filename}.json"
+                    category_rows = [p.to_dict() for p in products]
+                    rows.extend(category_rows)
                     data = {
                         "site": site_name,
                         "category": category,
                         "total_products": len(products),
-                        "products": [p.to_dict() for p in products]
+                        "products": category_rows
                     }
-                    with open(json_file, 'w', encoding='utf-8') as f:
-                        json.dump(data, f, indent=2, ensure_ascii=False)
+                    with open(json_file, 'wb') as f:
+                        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
                     print(f"  [OK] Saved {json_file} ({len(products)} products)")
 
-                    # Save CSV
-                    try:
-                        import pandas as pd
-                        csv_file = output_path / f"{filename}.csv"
-                        df = pd.DataFrame([p.to_dict() for p in products])
-                        df.to_csv(csv_file, index=False, encoding='utf-8')
-                        print(f"  [OK] Saved {csv_file}")
-                    except:
-                        pass
+        # CSV: one frame of every product, split per site and category
+        try:
+            write_category_csvs(rows, output_path)
+        except:
+            pass
 
         # Save combined summary
         total_products = sum(len(products) for site_products in self.results.values()
@@ -1,15 +1,39 @@
 """Final optimized scraper - scrapes homepage and categorizes products."""
 
 import asyncio
-import json
-import re
 from pathlib import Path
 from typing import List, Optional, Dict
 
+import orjson
 from patchright.async_api import async_playwright
 
 from models import Product
-from config import SITES, HEADLESS, TIMEOUT, OUTPUT_DIR, MAIN_CATEGORIES
+from config import SITES, HEADLESS, TIMEOUT, WAIT_FOR_LOAD, OUTPUT_DIR, MAIN_CATEGORIES, SCRAPE_CONCURRENCY
+from storefront import get_product_colors
+from scraping import (
+    PRICE_RE, words_re, new_scraping_context, CARD_SELECTORS, PRODUCT_CARDS_JS, PRODUCT_FORM_SELECTOR,
+    write_category_csvs,
+)
+
+# Category keywords checked in order against the lowercased URL + name
+CATEGORY_PATTERNS = (
+    ('Women', words_re('women', 'ladies', 'womens', 'female', 'girl')),
+    ('Men', words_re('men', 'mens', 'male', 'gents', 'boy', 'jobbs')),
+    ('Kids', words_re('kid', 'kids', 'children', 'child', 'baby')),
+)
+
+# Swatch/option elements that may carry a product page's colors
+COLOR_SELECTOR = '[class*="color"], [class*="swatch"], input[name*="Color"], input[name*="color"]'
+
+# Value, data-value, title or text of each matched color element
+COLOR_VALUES_JS = """(els, maxColors) => els.slice(0, maxColors).map(el =>
+    el.getAttribute('value') || el.getAttribute('data-value') || el.getAttribute('title') || el.innerText)"""
+
+# Selectors tried in turn for the homepage product cards
+PRODUCT_SELECTORS = ('.product-item', '.product-card', '.product', 'article.product')
+
+# Image URL fragments that mark payment gateway logos rather than products
+IMAGE_SKIP_TOKENS = ('mintpay', 'koko', 'payment', 'payhere')
 
 
 class FinalFashionScraper:
@@ -18,62 +42,54 @@ class FinalFashionScraper:
     def __init__(self, use_stealth: bool = True):
         self.use_stealth = use_stealth
         self.results = {}
-        self.page = None
 
     def clean_price(self, price_text: str) -> Optional[str]:
         """Extract main price from messy text."""
         if not price_text:
             return None
-        match = re.search(r'Rs\s*([\d,]+\.?\d*)', price_text)
+        match = PRICE_RE.search(price_text)
         return f"Rs {match.group(1)}" if match else None
 
     def detect_category(self, product_url: str, product_name: str) -> str:
         """Detect category from URL or name."""
         text = f"{product_url} {product_name}".lower()
 
-        if any(word in text for word in ['women', 'ladies', 'womens', 'female', 'girl']):
-            return 'Women'
-        elif any(word in text for word in ['men', 'mens', 'male', 'gents', 'boy', 'jobbs']):
-            return 'Men'
-        elif any(word in text for word in ['kid', 'kids', 'children', 'child', 'baby']):
-            return 'Kids'
+        for category, pattern in CATEGORY_PATTERNS:
+            if pattern.search(text):
+                return category
 
         return 'Women'  # Default to Women
 
-    async def get_colors_from_page(self, url: str) -> List[str]:
+    async def get_colors_from_page(self, page, url: str) -> List[str]:
         """Extract colors from product page."""
         colors = []
         try:
-            await self.page.goto(url, timeout=20000, wait_until="domcontentloaded")
-            await asyncio.sleep(0.5)
-
-            # Try to find color swatches or options
-            color_elems = await self.page.query_selector_all('[class*="color"], [class*="swatch"], input[name*="Color"], input[name*="color"]')
-
-            for elem in color_elems[:10]:
-                try:
-                    color = await elem.get_attribute('value')
-                    if not color:
-                        color = await elem.get_attribute('data-value')
-                    if not color:
-                        color = await elem.get_attribute('title')
-                    if not color:
-                        color = await elem.inner_text()
-
-                    if color and color.strip() and len(color.strip()) < 30:
-                        colors.append(color.strip())
-                except:
-                    pass
-
-            # Remove duplicates
-            colors = list(dict.fromkeys(colors))
+            await page.goto(url, timeout=20000, wait_until="domcontentloaded")
+            # The add-to-cart form marks a rendered product page
+            try:
+                await page.wait_for_selector(PRODUCT_FORM_SELECTOR, timeout=5000)
+            except:
+                pass
+
+            # Try to find color swatches or options, reading every
+            # candidate value in one round-trip
+            values = await page.eval_on_selector_all(COLOR_SELECTOR, COLOR_VALUES_JS, 10)
+
+            seen = set()
+            for color in values:
+                color = color.strip() if color else ''
+                if color and len(color) < 30 and color not in seen:
+                    seen.add(color)
+                    colors.append(color)
+                    if len(colors) >= 10:
+                        break
 
         except:
             pass
 
-        return colors[:10]
+        return colors
 
-    async def scrape_site(self, site_key: str) -> Dict[str, List[Product]]:
+    async def scrape_site(self, site_key: str, browser) -> Dict[str, List[Product]]:
         """Scrape site and organize by category."""
         site_config = SITES[site_key]
         print(f"\n{'='*60}")
@@ -81,120 +97,126 @@ class FinalFashionScraper:
         print(f"{'='*60}")
 
         categorized_products = {cat: [] for cat in MAIN_CATEGORIES}
+        shopify = site_config.get('type') == 'shopify'  # only Shopify serves the storefront JSON
 
         try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=HEADLESS)
-                self.page = await browser.new_page()
-                await self.page.set_viewport_size(dict(width=1920, height=1080))
+            context = await new_scraping_context(browser)
+            page = await context.new_page()
+            detail_page = None  # Second tab for product pages, so the homepage never reloads
+
+            try:
+                print(f"Loading {site_config['url']}...")
+                await page.goto(site_config['url'], timeout=TIMEOUT, wait_until="domcontentloaded")
+
+                # Find product elements
+                cards = None
 
+                # Wait once for any card selector, then take the first that matches
                 try:
-                    print(f"Loading {site_config['url']}...")
-                    await self.page.goto(site_config['url'], timeout=TIMEOUT, wait_until="networkidle")
-                    await asyncio.sleep(3)
-
-                    # Find product elements
-                    selectors = ['.product-item', '.product-card', '.product', 'article.product']
-                    product_elements = []
-
-                    for selector in selectors:
-                        try:
-                            await self.page.wait_for_selector(selector, timeout=5000)
-                            product_elements = await self.page.query_selector_all(selector)
-                            if product_elements:
-                                print(f"Found {len(product_elements)} products using '{selector}'")
+                    await page.wait_for_selector(', '.join(PRODUCT_SELECTORS), timeout=WAIT_FOR_LOAD)
+                except:
+                    pass
+
+                for selector in PRODUCT_SELECTORS:
+                    try:
+                        # Every card's fields in one round-trip
+                        cards = await page.eval_on_selector_all(selector, PRODUCT_CARDS_JS, [40, CARD_SELECTORS])
+                        if cards['count']:
+                            print(f"Found {cards['count']} products using '{selector}'")
+                            break
+                    except:
+                        continue
+
+                if not cards or not cards['count']:
+                    print("No products found!")
+                    return categorized_products
+
+                # Extract products
+                for idx, card in enumerate(cards['items'], 1):
+                    try:
+                        # Name
+                        name = card['name'] if card['name'] is not None else f"Product {idx}"
+                        name = name.strip()
+
+                        # Price
+                        price_text = card['price']
+                        price = self.clean_price(price_text) if price_text else None
+
+                        # Image - Get ACTUAL product image, not payment logos
+                        image_url = None
+                        for img in card['imgs']:
+                            src = img['src']
+                            if src:
+                                # Skip payment logos
+                                if any(x in src.lower() for x in IMAGE_SKIP_TOKENS):
+                                    continue
+                                # Skip very small images (likely icons)
+                                width = img['width']
+                                if width and int(width) < 50:
+                                    continue
+
+                                # Make URL absolute
+                                if src.startswith('//'):
+                                    image_url = 'https:' + src
+                                elif not src.startswith('http'):
+                                    base = site_config['url'].rstrip('/')
+                                    image_url = base + src
+                                else:
+                                    image_url = src
                                 break
-                        except:
-                            continue
-
-                    if not product_elements:
-                        print("No products found!")
-                        return categorized_products
-
-                    # Extract products
-                    for idx, elem in enumerate(product_elements[:40], 1):
-                        try:
-                            # Name
-                            name_elem = await elem.query_selector('h2, h3, .product-title, .product-name, a[href*="/products/"]')
-                            name = await name_elem.inner_text() if name_elem else f"Product {idx}"
-                            name = name.strip()
-
-                            # Price
-                            price_elem = await elem.query_selector('.price, [class*="price"]')
-                            price_text = await price_elem.inner_text() if price_elem else None
-                            price = self.clean_price(price_text) if price_text else None
-
-                            # Image - Get ACTUAL product image, not payment logos
-                            image_url = None
-                            imgs = await elem.query_selector_all('img')
-                            for img in imgs:
-                                src = await img.get_attribute('src')
-                                if src:
-                                    # Skip payment logos
-                                    if any(x in src.lower() for x in ['mintpay', 'koko', 'payment', 'payhere']):
-                                        continue
-                                    # Skip very small images (likely icons)
-                                    width = await img.get_attribute('width')
-                                    if width and int(width) < 50:
-                                        continue
-
-                                    # Make URL absolute
-                                    if src.startswith('//'):
-                                        image_url = 'https:' + src
-                                    elif not src.startswith('http'):
-                                        base = site_config['url'].rstrip('/')
-                                        image_url = base + src
-                                    else:
-                                        image_url = src
-                                    break
-
-                            # Product URL
-                            link_elem = await elem.query_selector('a[href*="/products/"]')
-                            product_url = None
-                            if link_elem:
-                                href = await link_elem.get_attribute('href')
-                                if href:
-                                    if href.startswith('http'):
-                                        product_url = href
-                                    else:
-                                        base = site_config['url'].rstrip('/')
-                                        product_url = base + href
-
-                            # Detect category
-                            category = self.detect_category(product_url or '', name)
-
-                            # Get colors (only for first 3 per category to save time)
-                            colors = []
-                            cat_count = len(categorized_products[category])
-                            if product_url and cat_count < 3:
-                                colors = await self.get_colors_from_page(product_url)
-                                # Navigate back
-                                await self.page.goto(site_config['url'], timeout=30000, wait_until="domcontentloaded")
-                                await asyncio.sleep(1)
-
-                            product = Product(
-                                name=name,
-                                main_category=category,
-                                price=price,
-                                colors=colors,
-                                image_url=image_url,
-                                product_url=product_url,
-                                site_name=site_config['name']
-                            )
-
-                            categorized_products[category].append(product)
-
-                            color_info = f", {len(colors)} colors" if colors else ""
-                            print(f"  [{category}] {idx}. {name[:40]} - {price}{color_info}")
-
-                        except Exception as e:
-                            print(f"  [!] Error parsing product {idx}: {e}")
-
-                except Exception as e:
-                    print(f"[ERROR] {e}")
-
-                finally:
-                    await browser.close()
+
+                        # Product URL
+                        product_url = None
+                        href = card['href']
+                        if href:
+                            if href.startswith('http'):
+                                product_url = href
+                            else:
+                                base = site_config['url'].rstrip('/')
+                                product_url = base + href
+
+                        # Detect category
+                        category = self.detect_category(product_url or '', name)
+
+                        # Get colors (only for first 3 per category to save time)
+                        colors = []
+                        cat_count = len(categorized_products[category])
+                        if product_url and cat_count < 3:
+                            # Shopify storefront JSON first; render the product page for
+                            # other platforms or if that fails
+                            colors = await get_product_colors(product_url) if shopify else None
+                            if colors is not None:
+                                colors = colors[:10]
+                            else:
+                                if detail_page is None:
+                                    detail_page = await context.new_page()
+                                colors = await self.get_colors_from_page(detail_page, product_url)
+
+                        product = Product(
+                            name=name,
+                            main_category=category,
+                            price=price,
+                            colors=colors,
+                            image_url=image_url,
+                            product_url=product_url,
+                            site_name=site_config['name']
+                        )
+
+                        categorized_products[category].append(product)
+
+                        color_info = f", {len(colors)} colors" if colors else ""
+                        print(f"  [{category}] {idx}. {name[:40]} - {price}{color_info}")
+
+                    except Exception as e:
+                        print(f"  [!] Error parsing product {idx}: {e}")
+
+            except Exception as e:
+                print(f"[ERROR] {e}")
+
+            finally:
+                if detail_page is not None:
+                    await detail_page.close()
+                await context.close()
 
         except Exception as e:
             print(f"[FATAL] {e}")
@@ -208,9 +230,23 @@ class FinalFashionScraper:
 
         print(f"\n>> Starting final scraping for {len(site_keys)} sites...")
 
-        for site_key in site_keys:
-            site_products = await self.scrape_site(site_key)
-            self.results[site_key] = site_products
+        # Scrape sites concurrently, at most SCRAPE_CONCURRENCY at a time
+        semaphore = asyncio.Semaphore(SCRAPE_CONCURRENCY)
+
+        # One browser for every site; each site gets its own context
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=HEADLESS)
+
+            async def run(site_key: str) -> Dict[str, List[Product]]:
+                async with semaphore:
+                    return await self.scrape_site(site_key, browser)
+
+            try:
+                results = await asyncio.gather(*(run(site_key) for site_key in site_keys))
+            finally:
+                await browser.close()
+
+        self.results.update(zip(site_keys, results))
 
     def save_results(self):
         """Save results by site and category."""
@@ -220,6 +256,7 @@ class FinalFashionScraper:
         print(f"\n[SAVE] Saving categorized results...")
 
         total = 0
+        rows = []  # Every product's to_dict, shared by the JSON and CSV writers
         for site_key, categories in self.results.items():
             site_name = SITES[site_key]['name'].lower().replace(" ", "_")
 
@@ -229,28 +266,26 @@ class FinalFashionScraper:
 
                     # JSON
                     json_file = output_path / f"{filename}.json"
+                    category_rows = [p.to_dict() for p in products]
+                    rows.extend(category_rows)
                     data = {
                         "site": SITES[site_key]['name'],
                         "category": category,
                         "total": len(products),
-                        "products": [p.to_dict() for p in products]
+                        "products": category_rows
                     }
-                    with open(json_file, 'w', encoding='utf-8') as f:
-                        json.dump(data, f, indent=2, ensure_ascii=False)
+                    with open(json_file, 'wb') as f:
+                        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
                     print(f"  [OK] {json_file} - {len(products)} products")
 
-                    # CSV
-                    try:
-                        import pandas as pd
-                        csv_file = output_path / f"{filename}.csv"
-                        df = pd.DataFrame([p.to_dict() for p in products])
-                        df.to_csv(csv_file, index=False, encoding='utf-8')
-                        print(f"  [OK] {csv_file}")
-                    except:
-                        pass
-
                     total += len(products)
 
+        # CSV: one frame of every product, split per site and category
+        try:
+            write_category_csvs(rows, output_path)
+        except:
+            pass
+
         print(f"\n[DONE] Total: {total} products across all categories")
 
 
@@ -0,0 +1,102 @@
+"""Browser routing, product-card extraction and CSV output shared by the scrapers."""
+
+import re
+from pathlib import Path
+from typing import List
+
+# First "Rs X,XXX.XX" amount in a price block
+PRICE_RE = re.compile(r'Rs\s*([\d,]+\.?\d*)')
+
+
+def words_re(*words: str) -> "re.Pattern[str]":
+    """One regex matching any of the words as a substring, like chained `in` tests."""
+    return re.compile("|".join(map(re.escape, words)))
+
+
+# Requests no scraper needs: image URLs are read from attributes, never
+# from the decoded pixels
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font"})
+
+# Scrapers that only read text and src/href attributes, never layout or
+# computed styles, also drop stylesheets and trackers
+TEXT_ONLY_RESOURCE_TYPES = BLOCKED_RESOURCE_TYPES | {"stylesheet"}
+BLOCKED_URL_TOKENS = ("google-analytics", "googletagmanager", "facebook.net", "hotjar")
+
+
+def resource_blocker(resource_types=BLOCKED_RESOURCE_TYPES, url_tokens=()):
+    """Route handler aborting requests of the given types or whose URL has one of the tokens."""
+    async def block(route):
+        request = route.request
+        if request.resource_type in resource_types or any(t in request.url for t in url_tokens):
+            await route.abort()
+        else:
+            await route.continue_()
+    return block
+
+
+# Abort image/media/font requests and let everything else through
+block_heavy_resources = resource_blocker()
+block_text_only_resources = resource_blocker(TEXT_ONLY_RESOURCE_TYPES, BLOCKED_URL_TOKENS)
+
+
+async def new_scraping_context(browser):
+    """Open a 1920x1080 browser context with heavy resources and trackers blocked."""
+    context = await browser.new_context(viewport=dict(width=1920, height=1080))
+    await context.route("**/*", block_text_only_resources)
+    return context
+
+
+# Fields of a product card, passed to PRODUCT_CARDS_JS once per page
+CARD_SELECTORS = {
+    'name': 'h2, h3, .product-title, .product-name, a[href*="/products/"]',
+    'price': '.price, [class*="price"]',
+    'image': 'img',
+    'link': 'a[href*="/products/"]',
+}
+
+# Name, price text, every image (src + width) and product link of the first `limit` cards
+PRODUCT_CARDS_JS = """(els, [limit, sel]) => ({
+    count: els.length,
+    items: els.slice(0, limit).map(el => {
+        const name = el.querySelector(sel.name);
+        const price = el.querySelector(sel.price);
+        const link = el.querySelector(sel.link);
+        return {
+            name: name ? name.innerText : null,
+            price: price ? price.innerText : null,
+            imgs: [...el.querySelectorAll(sel.image)].map(img => ({
+                src: img.getAttribute('src'),
+                width: img.getAttribute('width'),
+            })),
+            href: link ? link.getAttribute('href') : null,
+        };
+    }),
+})"""
+
+# Add-to-cart form, present once a product page's options have rendered
+PRODUCT_FORM_SELECTOR = 'form[action*="/cart/add"]'
+
+# Columns Product.to_dict only adds when the product has colors / sizes
+OPTIONAL_CSV_COLUMNS = ('colors_list', 'sizes_list')
+
+
+def write_category_csvs(rows: List[dict], output_path: Path) -> None:
+    """
+    Write one CSV per site and category from every product's to_dict.
+
+    The rows are loaded into a single frame and split with groupby; each
+    file keeps only the list columns its products have, in order of first
+    appearance, as a per-category frame would.
+    """
+    import pandas as pd
+
+    df = pd.DataFrame(rows)
+    if df.empty:
+        return
+    for (site, category), group in df.groupby(['site_name', 'main_category'], sort=False):
+        extra = sorted((c for c in OPTIONAL_CSV_COLUMNS if c in group and group[c].notna().any()),
+                       key=lambda c: group[c].first_valid_index())
+        group = group[[c for c in group.columns if c not in OPTIONAL_CSV_COLUMNS] + extra]
+        csv_file = output_path / f"{site.lower().replace(' ', '_')}_{category.lower()}.csv"
+        group.to_csv(csv_file, index=False, encoding='utf-8')
+        print(f"  [OK] Saved {csv_file}")
@@ -0,0 +1,90 @@
+"""Plain-HTTP access to Shopify storefront JSON, shared by the scrapers."""
+
+import asyncio
+from typing import List, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Shopify option names that hold a product's colors / sizes
+COLOR_OPTION_NAMES = {"color", "colour"}
+SIZE_OPTION_NAMES = {"size"}
+
+# Shopify's largest /products.json page, and how many pages a store is read
+PRODUCTS_PAGE_SIZE = 250
+MAX_PRODUCTS_PAGES = 20
+
+# Keep-alive connections to the storefronts, shared by every fetch thread
+session = requests.Session()
+session.headers.update({
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+    ),
+    "Accept": "application/json",
+})
+_adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8, max_retries=1)
+session.mount('https://', _adapter)
+session.mount('http://', _adapter)
+
+
+def product_js_url(product_url: str) -> str:
+    """Shopify's ``/products/<handle>.js`` endpoint for a product page URL."""
+    parts = urlsplit(product_url)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path.rstrip('/') + '.js', '', ''))
+
+
+def option_values(product: dict, names) -> Optional[List[str]]:
+    """Values of a Shopify product's first option named in ``names``, or None."""
+    for option in product.get('options') or []:
+        if isinstance(option, dict) and (option.get('name') or '').lower() in names:
+            return [str(v).strip() for v in option.get('values') or [] if str(v).strip()]
+    return None
+
+
+def fetch_products_page(site_url: str, page: int = 1, timeout: float = 10) -> Optional[List[dict]]:
+    """
+    Read one page of a Shopify store's ``/products.json``, without a browser.
+
+    Returns the page's products (an empty list past the last page), or None
+    when the endpoint is unavailable.
+    """
+    try:
+        response = session.get(
+            site_url.rstrip('/') + '/products.json',
+            params={'limit': PRODUCTS_PAGE_SIZE, 'page': page},
+            timeout=timeout,
+        )
+        response.raise_for_status()
+        products = response.json()['products']
+    except (requests.RequestException, ValueError, KeyError, TypeError):
+        return None
+    return products if isinstance(products, list) else None
+
+
+def fetch_product_colors(product_url: str, timeout: float = 10) -> Optional[List[str]]:
+    """
+    Read a product's colors from its Shopify JSON, without a browser.
+
+    Returns the values of the product's Color option (an empty list when it
+    has none), or None when the endpoint is unavailable so the caller can
+    fall back to rendering the page.
+    """
+    try:
+        response = session.get(product_js_url(product_url), timeout=timeout)
+        response.raise_for_status()
+        colors = option_values(response.json(), COLOR_OPTION_NAMES)
+    except (requests.RequestException, ValueError, AttributeError):
+        return None
+    return colors if colors is not None else []
+
+
+async def get_product_colors(product_url: str, timeout: float = 10) -> Optional[List[str]]:
+    """Async wrapper running fetch_product_colors in a worker thread."""
+    return await asyncio.to_thread(fetch_product_colors, product_url, timeout)
+
+
+async def get_products_page(site_url: str, page: int = 1, timeout: float = 10) -> Optional[List[dict]]:
+    """Async wrapper running fetch_products_page in a worker thread."""
+    return await asyncio.to_thread(fetch_products_page, site_url, page, timeout)
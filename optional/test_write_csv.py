@@ -0,0 +1,37 @@
+"""Test write_csv with products that do and don't have colors / sizes."""
+
+import csv
+import tempfile
+from pathlib import Path
+
+from models import Product
+from scraper import write_csv
+
+
+def test_mixed_products():
+    """Rows with keys the first row lacks get their own columns."""
+    rows = [
+        Product(name="Plain Tee", site_name="Fashion Bug", scraped_at="t").to_dict(),
+        Product(name="Striped Shirt", sizes=["S", "M"], site_name="Fashion Bug", scraped_at="t").to_dict(),
+        Product(name="Floral Frock", colors=["Red", "Blue"], site_name="Cool Planet", scraped_at="t").to_dict(),
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filepath = Path(tmp) / "all_products.csv"
+        write_csv(filepath, rows)
+        with open(filepath, encoding="utf-8", newline="") as f:
+            reader = csv.DictReader(f)
+            header = reader.fieldnames
+            written = list(reader)
+
+    # Union of keys, in order of first appearance
+    assert header == list(rows[0]) + ["sizes_list", "colors_list"]
+    assert [r["name"] for r in written] == ["Plain Tee", "Striped Shirt", "Floral Frock"]
+    assert written[0]["sizes_list"] == "" and written[0]["colors_list"] == ""
+    assert written[1]["sizes_list"] == "S, M" and written[1]["colors_list"] == ""
+    assert written[2]["colors_list"] == "Red, Blue" and written[2]["sizes_list"] == ""
+
+
+if __name__ == "__main__":
+    test_mixed_products()
+    print("Test complete!")
@@ -53,6 +53,7 @@ class CategoryScraper:
         self.site_name = site_name
         self.categories = categories
         self.all_products = []
+        self.scraped_at = datetime.now().isoformat()  # shared by every product of a run
 
     def detect_clothing_type(self, name: str) -> Optional[str]:
         """Detect clothing type from product name."""
@@ -89,6 +90,8 @@ class CategoryScraper:
         print(f"SCRAPING {self.site_name.upper()}")
         print(f"{'='*80}\n")
 
+        self.scraped_at = datetime.now().isoformat()
+
         async with async_playwright() as p:
             browser = await p.chromium.launch(headless=True)
             page = await browser.new_page()
@@ -490,7 +493,7 @@ class CategoryScraper:
                         image_url=image_url,
                         product_url=product_url,
                         site_name=self.site_name,
-                        scraped_at=datetime.now().isoformat()
+                        scraped_at=self.scraped_at
                     )
 
                     products.append(product)